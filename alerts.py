@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Configuration
+ALERT_COOLDOWN = 60     # Seconds before the same alert can fire again
+DEDUP_WINDOW = 60       # LLM suggestions on a topic alerted this recently are dropped
+
+# (rule id, suggestion shown to the rep, phrases that trigger it)
+ALERT_RULES = [
+    ("budget", "❗ Alert: Budget concern - anchor on ROI and offer a smaller starting package",
+     ["too expensive", "over budget", "out of our budget", "no budget", "can't afford", "cannot afford",
+      "budget", "too much money", "price is too high", "cheaper"]),
+    ("competitor", "❗ Alert: Competitor mentioned - ask what they like about it and contrast your strengths",
+     ["competitor", "another vendor", "other vendor", "salesforce", "hubspot", "zoho", "pipedrive",
+      "already using", "currently using"]),
+    ("not_interested", "❗ Alert: Disengagement - acknowledge it and ask one open question about their priorities",
+     ["not interested", "no thanks", "not right now", "too busy", "call me back later", "send me an email"]),
+    ("timing", "⚠️ Reminder: Timing objection - ask what would need to change to revisit this",
+     ["next quarter", "next year", "not a priority", "bad timing", "maybe later"]),
+    ("authority", "⚠️ Reminder: Identify the decision maker and offer to include them in the next call",
+     ["my boss", "my manager", "the board", "decision maker", "run it by", "check with"]),
+    ("close", "🎯 Close: Buying signal - confirm the next step and send the agreement",
+     ["send me a contract", "send the contract", "send me the contract", "send over the paperwork",
+      "where do i sign", "how do we get started", "let's move forward", "sounds good let's do it", "free trial"]),
+]
+
+
+def load_alert_rules(path: str):
+    """Read rules from a JSON list of {"id", "suggestion", "phrases"} objects"""
+    with open(path, encoding="utf-8") as rules_file:
+        return [(rule["id"], rule["suggestion"], rule["phrases"]) for rule in json.load(rules_file)]
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every occurrence of many phrases in one pass over the text.
+
+    The automaton (trie + failure links) is built once; matching costs
+    O(len(text) + matches) no matter how many phrases there are.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = [pattern.lower() for pattern in patterns]
+        self._goto = [{}]   # state -> {char: next state}
+        self._fail = [0]
+        self._output = [[]]  # state -> pattern indices ending here
+        for index, pattern in enumerate(self.patterns):
+            self._add(pattern, index)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, index: int):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str, whole_words=True) -> List[Tuple[int, int]]:
+        """Return ``(start, pattern_index)`` for every match, optionally on word boundaries only"""
+        text = text.lower()
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                start = position - len(self.patterns[index]) + 1
+                if whole_words and not self._on_word_boundary(text, start, position + 1):
+                    continue
+                matches.append((start, index))
+        return matches
+
+    @staticmethod
+    def _on_word_boundary(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or after.isalnum())
+
+
+class AlertEngine:
+    """Instant local alerts for objections and buying signals, no LLM call needed.
+
+    Each transcript entry is scanned once with an Aho-Corasick automaton
+    compiled from the rule phrases. A rule fires at most once per cooldown,
+    and LLM suggestions covering a topic that was just alerted are reported
+    as duplicates so the rep isn't told the same thing twice.
+    """
+
+    def __init__(self, rules=None, cooldown=ALERT_COOLDOWN, dedup_window=DEDUP_WINDOW):
+        if rules is None:
+            rules_path = os.getenv("ALERT_RULES_FILE")
+            rules = load_alert_rules(rules_path) if rules_path else ALERT_RULES
+        self.rules = rules
+        self.cooldown = cooldown
+        self.dedup_window = dedup_window
+        phrases = []
+        self._phrase_rule = []  # pattern index -> rule index
+        for rule_index, (_, _, rule_phrases) in enumerate(self.rules):
+            for phrase in rule_phrases:
+                phrases.append(phrase)
+                self._phrase_rule.append(rule_index)
+        self.matcher = AhoCorasick(phrases)
+        self._last_fired: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.alerts_fired = 0
+        self.duplicates_dropped = 0
+
+    def matched_rules(self, text: str) -> List[int]:
+        """Indices of the rules whose phrases occur in text, in order of first match"""
+        rules = []
+        for _, pattern_index in sorted(self.matcher.find(text)):
+            rule_index = self._phrase_rule[pattern_index]
+            if rule_index not in rules:
+                rules.append(rule_index)
+        return rules
+
+    def scan(self, text: str, now: Optional[float] = None) -> List[str]:
+        """Return the alert suggestions triggered by a new transcript entry"""
+        now = time.time() if now is None else now
+        alerts = []
+        with self._lock:
+            for rule_index in self.matched_rules(text):
+                if now - self._last_fired.get(rule_index, float("-inf")) < self.cooldown:
+                    continue
+                self._last_fired[rule_index] = now
+                self.alerts_fired += 1
+                alerts.append(self.rules[rule_index][1])
+        return alerts
+
+    def is_duplicate(self, suggestion: str, now: Optional[float] = None) -> bool:
+        """True if an LLM suggestion covers a topic that was alerted within the dedup window"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for rule_index in self.matched_rules(suggestion):
+                if now - self._last_fired.get(rule_index, float("-inf")) < self.dedup_window:
+                    self.duplicates_dropped += 1
+                    return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"alerts": self.alerts_fired, "duplicates_dropped": self.duplicates_dropped}
@@ -1,340 +1,163 @@
 import streamlit as st
-import asyncio
-import json
-import time
-from datetime import datetime, timedelta
-import threading
-import queue
-import io
-import wave
-import pyaudio
-import openai  # Still needed for Whisper transcription
-from groq import Groq  # Add Groq import
-from typing import List, Dict, Optional
-import requests
 import os
+import time
+from datetime import datetime
 from dotenv import load_dotenv
+from audio_recorder import is_cloud_mode
+from transcription import TranscriptionService
+from llm_assistant import LLMAssistant
+from pipeline import OVERFLOW_POLICIES
+from journal import unfinished_journals
+from utils import (
+    initialize_session_state,
+    start_session,
+    stop_session,
+    process_audio_chunk,
+    recover_session,
+    process_recording,
+    export_session_data,
+)
 load_dotenv()
 
 # Configuration
-CHUNK_SIZE = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 16000
-RECORD_SECONDS_CHUNK = 2  # Send audio chunks every 2 seconds
-LLM_UPDATE_INTERVAL = 3   # Update LLM suggestions every 3 seconds
+STATUS_REFRESH_INTERVAL = 0.25  # Longest wait between live status refreshes while recording
+FULL_RERUN_INTERVAL = 30.0      # Seconds between full-page reruns (sidebar stats, export data)
+TRANSCRIPT_ROWS = 20            # Transcript entries shown
+SUGGESTION_ROWS = 5             # Suggestions shown
 
-class AudioRecorder:
-    def __init__(self):
-        self.audio = pyaudio.PyAudio()
-        self.stream = None
-        self.is_recording = False
-        self.audio_queue = queue.Queue()
-        
-    def start_recording(self):
-        """Start recording audio from microphone"""
-        try:
-            self.stream = self.audio.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                input=True,
-                frames_per_buffer=CHUNK_SIZE,
-                stream_callback=self._audio_callback
-            )
-            self.is_recording = True
-            self.stream.start_stream()
-            return True
-        except Exception as e:
-            st.error(f"Error starting audio recording: {e}")
-            return False
-    
-    def stop_recording(self):
-        """Stop recording audio"""
-        self.is_recording = False
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-        
-    def _audio_callback(self, in_data, frame_count, time_info, status):
-        """Callback for audio stream"""
-        if self.is_recording:
-            self.audio_queue.put(in_data)
-        return (in_data, pyaudio.paContinue)
-    
-    def get_audio_chunk(self, duration_seconds=RECORD_SECONDS_CHUNK):
-        """Get audio chunk of specified duration"""
-        frames = []
-        frames_needed = int(RATE / CHUNK_SIZE * duration_seconds)
-        
-        for _ in range(frames_needed):
-            try:
-                frame = self.audio_queue.get(timeout=0.1)
-                frames.append(frame)
-            except queue.Empty:
-                break
-        
-        if frames:
-            # Convert to WAV format
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(CHANNELS)
-                wav_file.setsampwidth(self.audio.get_sample_size(FORMAT))
-                wav_file.setframerate(RATE)
-                wav_file.writeframes(b''.join(frames))
-            
-            wav_buffer.seek(0)
-            return wav_buffer.getvalue()
-        return None
-    
-    def cleanup(self):
-        """Cleanup audio resources"""
-        self.stop_recording()
-        self.audio.terminate()
+def render_transcript_entry(entry):
+    st.markdown(f"**{entry['timestamp']}** - {entry['text']}")
 
-class TranscriptionService:
-    def __init__(self, service_type="groq"):
-        self.service_type = service_type
-        self.openai_client = None
-        self.groq_client = None
-        
-        if service_type == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
-        elif service_type == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if api_key:
-                self.groq_client = Groq(api_key=api_key)
+def render_status(audio_status, session_status):
+    """Mic, session time, lag and saturation status (cheap; refreshed while recording)"""
+    with audio_status.container():
+        mic_status = "🟢 ON" if st.session_state.is_recording else "🔴 OFF"
+        st.markdown(f"**Mic Status:** {mic_status}")
+        recorder = st.session_state.audio_recorder
+        if recorder and recorder.vad:
+            st.markdown(f"**Silent Chunks Skipped:** {recorder.vad.stats()['skipped']}")
     
-    def transcribe_audio(self, audio_data: bytes) -> Optional[str]:
-        """Transcribe audio data to text"""
-        try:
-            if self.service_type == "groq" and self.groq_client:
-                # Create a temporary file-like object
-                audio_file = io.BytesIO(audio_data)
-                audio_file.name = "audio.wav"
-                
-                # Groq uses Whisper models for transcription
-                transcription = self.groq_client.audio.transcriptions.create(
-                    file=audio_file,
-                    model="whisper-large-v3",  # Groq's Whisper model
-                    response_format="text"
-                )
-                return transcription.strip()
-            elif self.service_type == "openai" and self.openai_client:
-                # Keep OpenAI as fallback option
-                audio_file = io.BytesIO(audio_data)
-                audio_file.name = "audio.wav"
-                
-                response = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
+    with session_status.container():
+        if st.session_state.session_start_time:
+            elapsed = datetime.now() - st.session_state.session_start_time
+            st.markdown(f"**Session Time:** {str(elapsed).split('.')[0]}")
+        else:
+            st.markdown("**Session Time:** --:--:--")
+        if st.session_state.pipeline:
+            lag = st.session_state.pipeline.lag_stats()
+            st.markdown(f"**STT Lag:** {lag['last']:.1f}s (avg {lag['average']:.1f}s)")
+            overflow = st.session_state.pipeline.overflow_stats()
+            if overflow['dropped_chunks'] or overflow['coalesced_chunks'] or overflow['dropped_seconds']:
+                st.markdown(
+                    f"**⚠️ Saturated:** {overflow['dropped_seconds']:.0f}s audio dropped, "
+                    f"{overflow['coalesced_chunks']} chunks merged"
                 )
-                return response.strip()
-            else:
-                # Fallback: Mock transcription for demo
-                return f"[Mock transcription at {datetime.now().strftime('%H:%M:%S')}]"
-        except Exception as e:
-            st.error(f"Transcription error: {e}")
-            return None
 
-class LLMAssistant:
-    def __init__(self, model_type="groq"):
-        self.model_type = model_type
-        self.openai_client = None
-        self.groq_client = None
-        self.conversation_context = []
-        
-        if model_type == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if api_key:
-                self.groq_client = Groq(api_key=api_key)
-        elif model_type == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
-        
-        self.system_prompt = """You are an AI sales assistant helping a sales representative during a live call. 
-        
-        Your role is to provide SHORT, actionable suggestions based on the conversation transcript. 
-        
-        Guidelines:
-        - Keep suggestions to 1-2 sentences maximum
-        - Focus on sales techniques, objection handling, and relationship building
-        - Provide specific, actionable advice
-        - Use these categories:
-          💡 Tip - General sales advice
-          ⚠️ Reminder - Important things not to forget
-          ❗ Alert - Urgent actions or red flags
-          🎯 Close - Closing opportunities
+def render_suggestions(suggestions_view, partial_suggestion):
+    """The most recent suggestions, plus the one still streaming in"""
+    with suggestions_view.container():
+        if st.session_state.suggestions:
+            # Show recent suggestions
+            for suggestion in st.session_state.suggestions[-SUGGESTION_ROWS:]:
+                if "priority" in suggestion:
+                    st.markdown(f"**{suggestion['timestamp']}** · priority {suggestion['priority']:.1f}")
+                else:
+                    st.markdown(f"**{suggestion['timestamp']}**")
+                st.markdown(f"{suggestion['text']}")
+                st.markdown("---")
+        elif not partial_suggestion:
+            st.markdown("*AI suggestions will appear here during the call...*")
         
-        Only respond with the suggestion, starting with the appropriate emoji category.
-        If no specific advice is needed, respond with "No suggestions at this time."
-        """
-    
-    def get_suggestions(self, transcript_chunk: str) -> List[str]:
-        """Get AI suggestions based on transcript"""
-        try:
-            if not transcript_chunk.strip():
-                return []
-                
-            if self.model_type == "groq" and self.groq_client:
-                response = self.groq_client.chat.completions.create(
-                    model="llama3-8b-8192",  # Groq's fast Llama model
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"Recent conversation: {transcript_chunk}"}
-                    ],
-                    max_tokens=100,
-                    temperature=0.7
-                )
-                
-                suggestion = response.choices[0].message.content.strip()
-                if suggestion and suggestion != "No suggestions at this time.":
-                    return [suggestion]
-                return []
-            elif self.model_type == "openai" and self.openai_client:
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"Recent conversation: {transcript_chunk}"}
-                    ],
-                    max_tokens=100,
-                    temperature=0.7
-                )
-                
-                suggestion = response.choices[0].message.content.strip()
-                if suggestion and suggestion != "No suggestions at this time.":
-                    return [suggestion]
-                return []
-            else:
-                # Mock suggestions for demo
-                mock_suggestions = [
-                    "💡 Tip: Ask about their current challenges",
-                    "⚠️ Reminder: Mention the ROI benefits",
-                    "❗ Alert: Customer mentioned budget concerns",
-                    "🎯 Close: Good time to ask for next steps"
-                ]
-                import random
-                return [random.choice(mock_suggestions)]
-                
-        except Exception as e:
-            st.error(f"LLM error: {e}")
-            return []
-
-def initialize_session_state():
-    """Initialize Streamlit session state variables"""
-    if 'is_recording' not in st.session_state:
-        st.session_state.is_recording = False
-    if 'transcript' not in st.session_state:
-        st.session_state.transcript = []
-    if 'suggestions' not in st.session_state:
-        st.session_state.suggestions = []
-    if 'session_start_time' not in st.session_state:
-        st.session_state.session_start_time = None
-    if 'audio_recorder' not in st.session_state:
-        st.session_state.audio_recorder = None
-    if 'transcription_service' not in st.session_state:
-        st.session_state.transcription_service = TranscriptionService("groq")  # Use Groq by default
-    if 'llm_assistant' not in st.session_state:
-        st.session_state.llm_assistant = LLMAssistant("groq")  # Use Groq by default
-    if 'last_llm_update' not in st.session_state:
-        st.session_state.last_llm_update = 0
+        if partial_suggestion:
+            # Suggestion still streaming in
+            st.markdown(f"✍️ {partial_suggestion}")
 
-def start_session():
-    """Start recording session"""
-    st.session_state.audio_recorder = AudioRecorder()
-    if st.session_state.audio_recorder.start_recording():
-        st.session_state.is_recording = True
-        st.session_state.session_start_time = datetime.now()
-        st.session_state.transcript = []
-        st.session_state.suggestions = []
-        st.success("🎙️ Recording started!")
-    else:
-        st.error("Failed to start recording")
+def render_suggestion_stats(stats_view):
+    """Latency, trigger, token, cache and cancellation captions under the suggestions"""
+    llm_assistant = st.session_state.llm_assistant
+    pipeline = st.session_state.pipeline
+    with stats_view.container():
+        latency = llm_assistant.latency_stats()
+        if latency["total"]:
+            st.caption(
+                f"First token {latency['ttft'] * 1000:.0f} ms · total {latency['total'] * 1000:.0f} ms "
+                f"(avg {latency['avg_ttft'] * 1000:.0f} / {latency['avg_total'] * 1000:.0f} ms)"
+            )
+        if pipeline:
+            alerts = pipeline.alert_engine.stats()
+            if alerts["alerts"]:
+                st.caption(
+                    f"{alerts['alerts']} instant alerts · {alerts['duplicates_dropped']} duplicate LLM suggestions hidden"
+                )
+            triggers = pipeline.trigger.stats()
+            st.caption(
+                f"{triggers['total']} suggestion requests for {triggers['entries']} transcript entries "
+                f"(phrases {triggers['phrase']}, turn ends {triggers['turn_end']}, "
+                f"max interval {triggers['max_interval']})"
+            )
+        prompt_tokens = llm_assistant.prompt_token_stats()
+        if prompt_tokens["last"]:
+            st.caption(f"Prompt tokens: {prompt_tokens['last']} (avg {prompt_tokens['average']:.0f})")
+        playbook = llm_assistant.playbook_stats()
+        if playbook["indexed"] and playbook["avg_seconds"]:
+            st.caption(
+                f"Playbook: {playbook['snippets']} snippets, {playbook['tokens']} prompt tokens "
+                f"(avg {playbook['avg_tokens']:.0f}) · lookup {playbook['seconds'] * 1000:.2f} ms "
+                f"(avg {playbook['avg_seconds'] * 1000:.2f} ms) · {playbook['indexed']} snippets indexed"
+            )
+        cache = llm_assistant.cache
+        if cache and cache.hits + cache.misses:
+            cache_stats = cache.stats()
+            st.caption(f"Suggestion cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        cancellations = llm_assistant.cancellation_stats()
+        if cancellations["cancelled"]:
+            st.caption(
+                f"{cancellations['cancelled']} stale requests cancelled "
+                f"(~{cancellations['saved_seconds']:.1f}s of waiting saved)"
+            )
 
-def stop_session():
-    """Stop recording session"""
-    if st.session_state.audio_recorder:
-        st.session_state.audio_recorder.stop_recording()
-        st.session_state.audio_recorder.cleanup()
-    st.session_state.is_recording = False
-    st.session_state.audio_recorder = None
-    st.success("🛑 Recording stopped!")
+def stream_live_updates(pipeline, transcript_container, transcript_hint, audio_status, session_status,
+                        suggestions_view, stats_view):
+    """Update the live views in place as the pipeline produces results.
 
-def process_audio_chunk():
-    """Process audio chunk for transcription and suggestions"""
-    if not st.session_state.is_recording or not st.session_state.audio_recorder:
-        return
-    
-    # Get audio chunk
-    audio_data = st.session_state.audio_recorder.get_audio_chunk()
-    if not audio_data:
-        return
-    
-    # Transcribe audio
-    transcript_text = st.session_state.transcription_service.transcribe_audio(audio_data)
-    if transcript_text and transcript_text.strip():
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        transcript_entry = {
-            "timestamp": timestamp,
-            "text": transcript_text
-        }
-        st.session_state.transcript.append(transcript_entry)
-    
-    # Update LLM suggestions periodically
-    current_time = time.time()
-    if current_time - st.session_state.last_llm_update > LLM_UPDATE_INTERVAL:
-        if st.session_state.transcript:
-            # Get recent transcript for context
-            recent_transcript = " ".join([entry["text"] for entry in st.session_state.transcript[-5:]])
-            suggestions = st.session_state.llm_assistant.get_suggestions(recent_transcript)
-            
-            for suggestion in suggestions:
-                suggestion_entry = {
-                    "timestamp": datetime.now().strftime("%H:%M:%S"),
-                    "text": suggestion
-                }
-                st.session_state.suggestions.append(suggestion_entry)
-            
-            # Keep only recent suggestions
-            st.session_state.suggestions = st.session_state.suggestions[-10:]
+    Instead of sleeping and rerunning the whole script, this waits on the
+    pipeline and only touches what changed: new transcript rows are
+    appended, suggestions are redrawn when a new one or more streamed text
+    arrives, and the small status views refresh at least every
+    STATUS_REFRESH_INTERVAL (which also lets button clicks interrupt the
+    loop promptly). A full rerun happens only after TRANSCRIPT_ROWS new rows,
+    to trim the transcript, or every FULL_RERUN_INTERVAL for the sidebar.
+    """
+    seen = pipeline.update_count
+    partial_suggestion = pipeline.partial_suggestion
+    appended_rows = 0
+    last_full_run = time.monotonic()
+    while st.session_state.is_recording:
+        seen = pipeline.wait_for_update(seen, timeout=STATUS_REFRESH_INTERVAL)
+        transcript_entries, suggestion_entries = process_audio_chunk()
         
-        st.session_state.last_llm_update = current_time
-
-def export_session_data():
-    """Export session data as JSON"""
-    if not st.session_state.transcript and not st.session_state.suggestions:
-        st.warning("No data to export")
-        return
-    
-    session_data = {
-        "session_info": {
-            "start_time": st.session_state.session_start_time.isoformat() if st.session_state.session_start_time else None,
-            "export_time": datetime.now().isoformat()
-        },
-        "transcript": st.session_state.transcript,
-        "suggestions": st.session_state.suggestions
-    }
-    
-    json_data = json.dumps(session_data, indent=2)
-    
-    st.download_button(
-        label="📥 Download Session Data",
-        data=json_data,
-        file_name=f"sales_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-        mime="application/json"
-    )
+        if transcript_entries:
+            transcript_hint.empty()
+            with transcript_container:
+                for entry in transcript_entries:
+                    render_transcript_entry(entry)
+            appended_rows += len(transcript_entries)
+        
+        if suggestion_entries or pipeline.partial_suggestion != partial_suggestion:
+            partial_suggestion = pipeline.partial_suggestion
+            render_suggestions(suggestions_view, partial_suggestion)
+            render_suggestion_stats(stats_view)
+        render_status(audio_status, session_status)
+        
+        if appended_rows >= TRANSCRIPT_ROWS or time.monotonic() - last_full_run >= FULL_RERUN_INTERVAL:
+            st.rerun()
 
 def main():
     st.title("🎙️ Real-Time GenAI Sales Teleprompter")
+    initialize_session_state()
     
-    # Check if running in cloud mode
-    audio_recorder = AudioRecorder()
-    if audio_recorder.is_cloud_mode:
+    # Check if running in cloud mode (probed once per process)
+    if is_cloud_mode():
         st.info("🌐 Running in Cloud Mode - Upload audio files or use the web recorder")
         
         # Add file upload option
@@ -344,8 +167,9 @@ def main():
         )
         
         if uploaded_file is not None:
-            audio_data = uploaded_file.read()
-            # Process uploaded audio...
+            if st.button("📼 Transcribe Recording", disabled=st.session_state.is_recording,
+                         help="Transcribe the whole call in parallel chunks and suggest for every part of it"):
+                process_recording(uploaded_file.getvalue())
     
     # API Configuration Section
     with st.sidebar:
@@ -366,16 +190,126 @@ def main():
             help="Choose your LLM service for suggestions"
         )
         
+        st.session_state.max_in_flight = st.number_input(
+            "Max In-Flight Transcriptions",
+            min_value=1,
+            max_value=8,
+            value=st.session_state.max_in_flight,
+            help="Audio chunks transcribed concurrently (applies to the next session)"
+        )
+        
+        st.session_state.vad_threshold = st.slider(
+            "Silence Threshold",
+            min_value=0.0,
+            max_value=0.1,
+            value=st.session_state.vad_threshold,
+            step=0.001,
+            format="%.3f",
+            help="Audio quieter than this is treated as silence and not transcribed (0 disables)"
+        )
+        st.session_state.vad_hangover_ms = st.slider(
+            "Speech Hangover (ms)",
+            min_value=0,
+            max_value=1000,
+            value=st.session_state.vad_hangover_ms,
+            step=50,
+            help="How long audio after speech is still treated as speech"
+        )
+        
+        st.session_state.overflow_policy = st.selectbox(
+            "Overflow Policy",
+            OVERFLOW_POLICIES,
+            index=OVERFLOW_POLICIES.index(st.session_state.overflow_policy),
+            help="What to do with new audio when transcription falls behind (applies to the next session)"
+        )
+        
+        st.session_state.stream_suggestions = st.checkbox(
+            "Stream Suggestions",
+            value=st.session_state.stream_suggestions,
+            help="Show suggestions word by word as the model writes them (applies to the next session)"
+        )
+        
+        st.session_state.structured_suggestions = st.checkbox(
+            "All Categories Per Request",
+            value=st.session_state.structured_suggestions,
+            help="Ask for a ranked tip, reminder, alert and close in one JSON request instead of "
+                 "a single streamed suggestion (applies to the next session)"
+        )
+        
+        context = st.session_state.llm_assistant.conversation_context
+        context.token_budget = st.number_input(
+            "Context Token Budget",
+            min_value=100,
+            max_value=4000,
+            value=context.token_budget,
+            step=100,
+            help="Prompt tokens for the call summary plus recent transcript sent with each suggestion request"
+        )
+        
+        st.session_state.failover = st.checkbox(
+            "Provider Failover",
+            value=st.session_state.failover,
+            help="Retry failed requests with the other provider when both API keys are set"
+        )
+        st.session_state.hedge_requests = st.checkbox(
+            "Hedge Slow Requests",
+            value=st.session_state.hedge_requests,
+            help="Send a backup request to the other provider when the first one is slower "
+                 "than usual (p95) and use whichever answers first"
+        )
+        
         if st.button("🔄 Update Services"):
-            st.session_state.transcription_service = TranscriptionService(transcription_service)
-            st.session_state.llm_assistant = LLMAssistant(llm_service)
+            st.session_state.transcription_service = TranscriptionService(
+                transcription_service,
+                failover=st.session_state.failover,
+                hedge=st.session_state.hedge_requests
+            )
+            st.session_state.llm_assistant = LLMAssistant(
+                llm_service,
+                failover=st.session_state.failover,
+                hedge=st.session_state.hedge_requests
+            )
             st.success("Services updated!")
         
+        for label, service in (("STT", st.session_state.transcription_service),
+                               ("LLM", st.session_state.llm_assistant)):
+            stats = service.provider_stats()
+            circuits = ", ".join(f"{name}: {state}" for name, state in stats["circuits"].items()) or "demo mode"
+            st.caption(f"{label} providers - {circuits} | retries {stats['retries']}, "
+                       f"failovers {stats['failovers']}, hedges {stats['hedge_wins']}/{stats['hedges']} won")
+        
+        rate_limiter = st.session_state.llm_assistant.rate_limiter
+        in_use = set(st.session_state.transcription_service.clients) | set(st.session_state.llm_assistant.clients)
+        for provider, headroom in rate_limiter.headroom().items():
+            if provider in in_use:
+                st.caption(f"{provider} quota headroom - requests {headroom['requests']:.0%}, "
+                           f"tokens {headroom['tokens']:.0%}")
+        connection_stats = st.session_state.transcription_service.client_pool.stats()
+        for provider in sorted(in_use):
+            counts = connection_stats[provider]
+            if counts["requests"]:
+                st.caption(f"{provider} connections - {counts['requests']} requests, "
+                           f"{counts['reused'] / counts['requests']:.0%} on a reused connection")
+        quota_stats = rate_limiter.stats()
+        if quota_stats["deferred"] or quota_stats["shed"]:
+            st.caption(f"Suggestions deferred {quota_stats['deferred']}, shed {quota_stats['shed']} "
+                       "to keep transcription within quota")
+        
         st.markdown("---")
         st.markdown("**API Keys Required:**")
         st.markdown("- `GROQ_API_KEY` (Primary)")
         st.markdown("- `OPENAI_API_KEY` (Optional)")
     
+    # Offer to recover sessions interrupted by a browser or server crash
+    if not st.session_state.is_recording:
+        current_journal = st.session_state.journal.path if st.session_state.journal else None
+        interrupted = [path for path in unfinished_journals() if path != current_journal]
+        if interrupted:
+            with st.expander(f"♻️ {len(interrupted)} interrupted session(s) found"):
+                journal_path = st.selectbox("Session", interrupted, format_func=os.path.basename)
+                if st.button("Recover Session"):
+                    recover_session(journal_path)
+    
     # Controls
     col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
     
@@ -388,21 +322,15 @@ def main():
                 stop_session()
     
     with col2:
-        mic_status = "🟢 ON" if st.session_state.is_recording else "🔴 OFF"
-        st.markdown(f"**Mic Status:** {mic_status}")
-    
+        audio_status = st.empty()
     with col3:
-        if st.session_state.session_start_time:
-            elapsed = datetime.now() - st.session_state.session_start_time
-            st.markdown(f"**Session Time:** {str(elapsed).split('.')[0]}")
-        else:
-            st.markdown("**Session Time:** --:--:--")
+        session_status = st.empty()
     
     with col4:
-        if st.session_state.transcript or st.session_state.suggestions:
+        if st.session_state.journal:
             export_session_data()
     
-    # Process audio if recording
+    # Collect results from the background pipeline
     if st.session_state.is_recording:
         process_audio_chunk()
     
@@ -414,26 +342,24 @@ def main():
         
         transcript_container = st.container()
         with transcript_container:
+            transcript_hint = st.empty()
             if st.session_state.transcript:
                 # Show recent transcript entries
-                for entry in st.session_state.transcript[-20:]:  # Show last 20 entries
-                    st.markdown(f"**{entry['timestamp']}** - {entry['text']}")
+                for entry in st.session_state.transcript.recent(TRANSCRIPT_ROWS):
+                    render_transcript_entry(entry)
             else:
-                st.markdown("*Transcript will appear here when recording starts...*")
+                transcript_hint.markdown("*Transcript will appear here when recording starts...*")
     
     with col_suggestions:
         st.subheader("💡 AI Suggestions")
-        
-        suggestions_container = st.container()
-        with suggestions_container:
-            if st.session_state.suggestions:
-                # Show recent suggestions
-                for suggestion in st.session_state.suggestions[-5:]:  # Show last 5 suggestions
-                    st.markdown(f"**{suggestion['timestamp']}**")
-                    st.markdown(f"{suggestion['text']}")
-                    st.markdown("---")
-            else:
-                st.markdown("*AI suggestions will appear here during the call...*")
+        suggestions_view = st.empty()
+        stats_view = st.empty()
+    
+    pipeline = st.session_state.pipeline
+    partial_suggestion = pipeline.partial_suggestion if pipeline else None
+    render_status(audio_status, session_status)
+    render_suggestions(suggestions_view, partial_suggestion)
+    render_suggestion_stats(stats_view)
     
     # Instructions
     with st.expander("ℹ️ Setup Instructions"):
@@ -473,10 +399,12 @@ def main():
         - 🚀 Optimized for real-time applications
         """)
     
-    # Auto-refresh for real-time updates
-    if st.session_state.is_recording:
-        time.sleep(1)
-        st.rerun()
+    # Keep updating the live views in place until a widget interaction reruns the script
+    if st.session_state.is_recording and pipeline:
+        stream_live_updates(
+            pipeline, transcript_container, transcript_hint, audio_status, session_status,
+            suggestions_view, stats_view
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import io
+import json
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from transcript_store import format_timestamps
+
+# Configuration
+ARCHIVE_MAGIC = b"TPZ1"     # Format identifier and version
+ARCHIVE_EXTENSION = ".tpz"
+COMPRESSION_LEVEL = 6
+# zlib makes the archive ~5x smaller, but decompressing the transcript takes most of a full load;
+# raw, the transcript alone loads ~2.5x faster and a full load about matches json.loads
+COMPRESS_TRANSCRIPT = True
+
+TEXT_SEPARATOR = "\x1f"    # Unit separator between transcript texts, so loading is one str.split
+
+CODEC_RAW = "raw"
+CODEC_ZLIB = "zlib"         # Archives written before codecs were recorded are all zlib
+
+SECTION_TRANSCRIPT = "transcript"
+SECTION_SUGGESTIONS = "suggestions"
+
+
+def write_archive(transcript: List[Tuple[int, str]], suggestions: List[Dict], session_info: Dict,
+                  compress_transcript=COMPRESS_TRANSCRIPT) -> bytes:
+    """Pack a session into the compact archive format.
+
+    Layout: magic, a length-prefixed JSON header (session info plus the
+    offset, length, entry count and codec of each section), then the
+    sections. The transcript is columnar: a delta-encoded epoch-ms
+    timestamp column, a text length column and one UTF-8 text blob, whose
+    texts are also joined by TEXT_SEPARATOR when none contains it
+    (``"separated"`` in the section header); it is zlib-compressed only
+    with ``compress_transcript``. Suggestions are few and have varying
+    fields, so they are stored as zlib-compressed compact JSON.
+    """
+    texts = [text for _, text in transcript]
+    separated = not any(TEXT_SEPARATOR in text for text in texts)
+    transcript_codec = CODEC_ZLIB if compress_transcript else CODEC_RAW
+    sections = [
+        (SECTION_TRANSCRIPT, _encode(_pack_transcript(transcript, separated), transcript_codec), len(transcript),
+         {"codec": transcript_codec, "separated": separated}),
+        (SECTION_SUGGESTIONS, _encode(
+            json.dumps(suggestions, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), CODEC_ZLIB
+        ), len(suggestions), {"codec": CODEC_ZLIB}),
+    ]
+    index, offset = {}, 0
+    for name, payload, count, details in sections:
+        index[name] = {"offset": offset, "length": len(payload), "count": count, **details}
+        offset += len(payload)
+    header = json.dumps({"session_info": session_info, "sections": index}, separators=(",", ":")).encode("utf-8")
+
+    output = io.BytesIO()
+    output.write(ARCHIVE_MAGIC)
+    output.write(struct.pack("<I", len(header)))
+    output.write(header)
+    for _, payload, _, _ in sections:
+        output.write(payload)
+    return output.getvalue()
+
+
+def _pack_transcript(transcript: List[Tuple[int, str]], separated: bool) -> bytes:
+    times = np.fromiter((time_ms for time_ms, _ in transcript), dtype="<i8", count=len(transcript))
+    texts = [text for _, text in transcript]
+    first = int(times[0]) if len(times) else 0
+    deltas = np.diff(times).astype("<i4")
+    lengths = np.fromiter((len(text) for text in texts), dtype="<u4", count=len(texts))
+    raw = b"".join((
+        struct.pack("<Iq", len(texts), first), deltas.tobytes(), lengths.tobytes(),
+        (TEXT_SEPARATOR if separated else "").join(texts).encode("utf-8")
+    ))
+    return raw
+
+
+def _encode(payload: bytes, codec: str) -> bytes:
+    return zlib.compress(payload, COMPRESSION_LEVEL) if codec == CODEC_ZLIB else payload
+
+
+class ArchiveReader:
+    """Reads a session archive, decoding only the sections asked for.
+
+    Opening it reads just the header, so ``session_info`` and the entry
+    counts are available without touching the data. Partial loads are
+    what is fast: a full load of a compressed archive is slower than
+    ``json.loads`` of the JSON export (see benchmarks/archive_benchmark.py).
+    """
+
+    def __init__(self, source):
+        # A path or the archive bytes
+        self._data = source if isinstance(source, (bytes, bytearray, memoryview)) else None
+        self.path = None if self._data is not None else source
+        head = self._read(0, len(ARCHIVE_MAGIC) + 4)
+        if head[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            raise ValueError("Not a session archive")
+        (header_length,) = struct.unpack("<I", head[len(ARCHIVE_MAGIC):])
+        header = json.loads(self._read(len(head), header_length))
+        self.session_info: Dict = header["session_info"]
+        self.sections: Dict[str, Dict] = header["sections"]
+        self._data_start = len(head) + header_length
+
+    def count(self, section: str) -> int:
+        return self.sections[section]["count"]
+
+    def transcript(self) -> List[Tuple[int, str]]:
+        """``(time_ms, text)`` pairs"""
+        times, texts = self._transcript_columns()
+        return list(zip(times.tolist(), texts))
+
+    def _transcript_columns(self) -> Tuple[np.ndarray, List[str]]:
+        raw = self._section(SECTION_TRANSCRIPT)
+        count, first = struct.unpack_from("<Iq", raw)
+        position = struct.calcsize("<Iq")
+        deltas = np.frombuffer(raw, dtype="<i4", count=max(count - 1, 0), offset=position)
+        position += deltas.nbytes
+        lengths = np.frombuffer(raw, dtype="<u4", count=count, offset=position)
+        position += lengths.nbytes
+        blob = raw[position:].decode("utf-8")
+
+        if not count:
+            return np.zeros(0, dtype=np.int64), []
+        times = np.concatenate(([first], first + np.cumsum(deltas, dtype="<i8")))
+        if self.sections[SECTION_TRANSCRIPT].get("separated"):
+            return times, blob.split(TEXT_SEPARATOR)
+        ends = np.cumsum(lengths, dtype="<i8").tolist()
+        return times, list(map(blob.__getitem__, map(slice, [0] + ends[:-1], ends)))
+
+    def suggestions(self) -> List[Dict]:
+        return json.loads(self._section(SECTION_SUGGESTIONS))
+
+    def to_session_data(self, sections: Optional[List[str]] = None) -> Dict:
+        """The same layout as the JSON export, with only the requested sections"""
+        sections = sections or [SECTION_TRANSCRIPT, SECTION_SUGGESTIONS]
+        session_data = {"session_info": self.session_info}
+        if SECTION_TRANSCRIPT in sections:
+            times, texts = self._transcript_columns()
+            session_data["transcript"] = [
+                {"timestamp": timestamp, "text": text} for timestamp, text in zip(format_timestamps(times), texts)
+            ]
+        if SECTION_SUGGESTIONS in sections:
+            session_data["suggestions"] = self.suggestions()
+        return session_data
+
+    def _section(self, name: str) -> bytes:
+        section = self.sections[name]
+        payload = self._read(self._data_start + section["offset"], section["length"])
+        return zlib.decompress(payload) if section.get("codec", CODEC_ZLIB) == CODEC_ZLIB else payload
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._data is not None:
+            return bytes(self._data[offset:offset + length])
+        with open(self.path, "rb") as archive_file:
+            archive_file.seek(offset)
+            return archive_file.read(length)
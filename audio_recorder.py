@@ -1,32 +1,494 @@
 import streamlit as st
 import io
+import struct
+import threading
+import time
 import wave
+import numpy as np
 from datetime import datetime
-from audio_recorder_streamlit import audio_recorder
+from typing import Iterator, Optional, Tuple
 
-# Try to import pyaudio for local development
+# soundfile is optional: it adds FLAC encoding and non-WAV decoding for uploads
 try:
-    import pyaudio
-    import queue
-    PYAUDIO_AVAILABLE = True
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
 except ImportError:
-    PYAUDIO_AVAILABLE = False
-    st.info("Running in cloud mode - using file upload instead of live recording")
+    SOUNDFILE_AVAILABLE = False
 
 # Configuration
 CHUNK_SIZE = 1024
-FORMAT = pyaudio.paInt16 if PYAUDIO_AVAILABLE else None
 CHANNELS = 1
 RATE = 16000
 RECORD_SECONDS_CHUNK = 2
 
+# Voice activity detection
+VAD_FRAME_MS = 30              # Analysis frame length
+VAD_ENERGY_THRESHOLD = 0.01    # Normalized RMS above which a frame is speech
+VAD_ZCR_THRESHOLD = 0.25       # Zero-crossing rate marking quiet unvoiced speech (s, f, sh)
+VAD_HANGOVER_MS = 300          # Keep classifying as speech this long after the last speech frame
+VAD_MIN_SPEECH_MS = 200        # Chunks with less speech than this are dropped
+
+
+class VoiceActivityDetector:
+    """Energy / zero-crossing voice activity detector for 16-bit PCM audio.
+
+    Frames are classified in one vectorized pass: a frame is speech when its
+    RMS energy exceeds ``energy_threshold``, or when it is at least half as
+    loud and has a high zero-crossing rate (unvoiced consonants). Speech is
+    extended by ``hangover_ms`` so short gaps between words are not cut.
+    """
+
+    def __init__(self, rate=RATE, energy_threshold=VAD_ENERGY_THRESHOLD, zcr_threshold=VAD_ZCR_THRESHOLD,
+                 hangover_ms=VAD_HANGOVER_MS, min_speech_ms=VAD_MIN_SPEECH_MS, frame_ms=VAD_FRAME_MS):
+        self.rate = rate
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.frame_length = max(1, int(rate * frame_ms / 1000))
+        self.hangover_frames = int(hangover_ms / frame_ms)
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.chunks_checked = 0
+        self.chunks_skipped = 0
+
+    def classify_frames(self, samples):
+        """Return a boolean speech flag per frame for mono int16 samples"""
+        speech = self._raw_speech_frames(samples)
+        if self.hangover_frames and len(speech):
+            # A frame counts as speech if any of the preceding hangover frames was speech
+            window = np.ones(self.hangover_frames + 1)
+            speech = np.convolve(speech, window)[:len(speech)] > 0
+        return speech
+
+    def _raw_speech_frames(self, samples):
+        """Per-frame speech flags before the hangover extends them"""
+        samples = np.asarray(samples)
+        n_frames = len(samples) // self.frame_length
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        frames = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        return (rms >= self.energy_threshold) | (
+            (rms >= self.energy_threshold / 2) & (zcr >= self.zcr_threshold)
+        )
+
+    def is_speech(self, pcm_data: bytes) -> bool:
+        """Check raw 16-bit mono PCM for speech and update the skip counters"""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        # Raw frames: with the hangover a click would count as hangover_ms of speech
+        has_speech = int(self._raw_speech_frames(samples).sum()) >= self.min_speech_frames
+        self.chunks_checked += 1
+        if not has_speech:
+            self.chunks_skipped += 1
+        return has_speech
+
+    def classify_wav(self, wav_data: bytes):
+        """Classify frames of a 16-bit WAV file (bytes), downmixing multi-channel audio"""
+        with wave.open(io.BytesIO(wav_data), 'rb') as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError("Only 16-bit WAV audio is supported")
+            channels = wav_file.getnchannels()
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return self.classify_frames(samples)
+
+    def stats(self):
+        """Chunks checked and transcription requests saved this session"""
+        return {"checked": self.chunks_checked, "skipped": self.chunks_skipped}
+
+
+# Endpointing
+CHUNK_MIN_SECONDS = 1.0        # Never send chunks shorter than this
+CHUNK_MAX_SECONDS = 6.0        # Always cut by this length, pause or not
+PAUSE_MS = 240                 # Silence long enough to count as a natural break
+LATENCY_FACTOR = 1.5           # Target chunk length relative to measured STT latency
+LATENCY_SMOOTHING = 0.3        # Weight of the newest latency sample in the moving average
+
+
+class EndpointingChunker:
+    """Cuts captured PCM into chunks at natural pauses instead of fixed slices.
+
+    Audio accumulates until it reaches ``target_seconds``; the chunk is then
+    closed in the middle of the latest pause that is at least ``pause_ms``
+    long, so words are not split across requests. ``max_seconds`` forces a
+    cut when nobody pauses. The target follows the measured transcription
+    latency: a slow backend gets fewer, longer chunks and a fast one gets
+    shorter chunks for lower end-to-end latency.
+    """
+
+    def __init__(self, rate=RATE, min_seconds=CHUNK_MIN_SECONDS, max_seconds=CHUNK_MAX_SECONDS,
+                 pause_ms=PAUSE_MS, target_seconds=RECORD_SECONDS_CHUNK, latency_factor=LATENCY_FACTOR,
+                 energy_threshold=VAD_ENERGY_THRESHOLD):
+        self.rate = rate
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.target_seconds = min(max(target_seconds, min_seconds), max_seconds)
+        self.latency_factor = latency_factor
+        self.latency_average = None
+        # Pause detection needs the raw frame decisions, without hangover
+        self.detector = VoiceActivityDetector(rate=rate, energy_threshold=energy_threshold, hangover_ms=0)
+        self.pause_frames = max(1, int(pause_ms / VAD_FRAME_MS))
+        self.pending = bytearray()
+
+    @property
+    def pending_seconds(self):
+        return len(self.pending) / 2 / self.rate
+
+    def add(self, pcm_data: bytes) -> Optional[bytes]:
+        """Append 16-bit mono PCM; returns a finished chunk once one can be closed"""
+        self.pending += pcm_data
+        cut = self.find_cut(self.pending)
+        if cut is None:
+            return None
+
+        chunk = bytes(self.pending[:cut])
+        del self.pending[:cut]
+        return chunk
+
+    def flush(self) -> Optional[bytes]:
+        """Return whatever audio is still pending"""
+        if not self.pending:
+            return None
+        chunk = bytes(self.pending)
+        self.pending.clear()
+        return chunk
+
+    def record_latency(self, seconds: float):
+        """Feed a measured transcription round trip and retune the target length"""
+        if self.latency_average is None:
+            self.latency_average = seconds
+        else:
+            self.latency_average += LATENCY_SMOOTHING * (seconds - self.latency_average)
+        target = self.latency_average * self.latency_factor
+        self.target_seconds = min(max(target, self.min_seconds), self.max_seconds)
+
+    def find_cut(self, pcm_data) -> Optional[int]:
+        """Byte length of the chunk to close from buffered PCM, or None to keep waiting"""
+        seconds = len(pcm_data) / 2 / self.rate
+        if seconds < self.target_seconds:
+            return None
+
+        max_bytes = int(self.max_seconds * self.rate) * 2
+        # Only pauses within max_seconds qualify, however much audio is buffered
+        cut = self._find_pause_cut(pcm_data[:max_bytes])
+        if cut is None and seconds >= self.max_seconds:
+            cut = max_bytes
+        return cut
+
+    def _find_pause_cut(self, pcm_data) -> Optional[int]:
+        """Byte offset in the middle of the latest long-enough pause after min_seconds"""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        silent = ~self.detector.classify_frames(samples)
+        if not silent.any():
+            return None
+
+        # Start/end frame indices of every silent run
+        edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        min_frame = int(self.min_seconds * self.rate) // self.detector.frame_length
+        mids = (starts + ends) // 2
+        usable = ((ends - starts) >= self.pause_frames) & (mids >= min_frame)
+        if not usable.any():
+            return None
+        return int(mids[usable][-1]) * self.detector.frame_length * 2
+
+
+# Capture buffer
+RING_BUFFER_SECONDS = 30       # Captured audio held before the oldest is overwritten
+SAMPLE_WIDTH = 2               # Bytes per 16-bit sample
+
+# Upload preprocessing
+TARGET_RATE = 16000            # Whisper works on 16 kHz mono; anything more is wasted upload
+
+
+def wav_header(num_bytes, rate=RATE, channels=CHANNELS, sample_width=SAMPLE_WIDTH):
+    """44-byte PCM WAV header for num_bytes of audio data"""
+    return _wav_header_struct.pack(
+        b'RIFF', 36 + num_bytes, b'WAVE', b'fmt ', 16, 1, channels, rate,
+        rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b'data', num_bytes
+    )
+
+
+_wav_header_struct = struct.Struct('<4sI4s4sIHHIIHH4sI')
+# Every local chunk shares this header; only the two length fields change
+_WAV_HEADER_TEMPLATE = bytearray(wav_header(0))
+
+
+def pcm_to_wav(pcm_data) -> bytes:
+    """Wrap 16 kHz mono 16-bit PCM in a WAV container with a single buffer assembly"""
+    num_bytes = len(pcm_data)
+    header = bytearray(_WAV_HEADER_TEMPLATE)
+    struct.pack_into('<I', header, 4, 36 + num_bytes)
+    struct.pack_into('<I', header, 40, num_bytes)
+    return b''.join((header, pcm_data))
+
+
+def wav_duration(wav_data) -> float:
+    """Duration in seconds of a PCM WAV file, or 0.0 if it is not one"""
+    try:
+        with wave.open(io.BytesIO(wav_data), 'rb') as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    except (wave.Error, EOFError):
+        return 0.0
+
+
+def merge_wav_chunks(first, second, max_seconds=None):
+    """Join two WAV chunks with the same format, keeping at most the last max_seconds.
+
+    Returns ``(wav_bytes, trimmed_seconds)``, or ``(None, 0.0)`` when the
+    chunks are not PCM WAV files with matching parameters.
+    """
+    try:
+        with wave.open(io.BytesIO(first), 'rb') as a, wave.open(io.BytesIO(second), 'rb') as b:
+            params = (a.getnchannels(), a.getsampwidth(), a.getframerate())
+            if params != (b.getnchannels(), b.getsampwidth(), b.getframerate()):
+                return None, 0.0
+            pcm = a.readframes(a.getnframes()) + b.readframes(b.getnframes())
+    except (wave.Error, EOFError):
+        return None, 0.0
+
+    channels, sample_width, rate = params
+    frame_bytes = channels * sample_width
+    trimmed_seconds = 0.0
+    if max_seconds is not None:
+        max_bytes = int(max_seconds * rate) * frame_bytes
+        if len(pcm) > max_bytes:
+            trimmed_seconds = (len(pcm) - max_bytes) / frame_bytes / rate
+            pcm = pcm[-max_bytes:]
+    return b''.join((wav_header(len(pcm), rate, channels, sample_width), pcm)), trimmed_seconds
+
+
+def decode_audio(audio_data) -> Optional[Tuple[np.ndarray, int]]:
+    """Decode audio bytes to float32 samples shaped (frames, channels) and the sample rate.
+
+    PCM WAV is decoded natively; other containers (FLAC, OGG, MP3, ...) need
+    the optional ``soundfile`` package. Returns None if the data can't be decoded.
+    """
+    try:
+        with wave.open(io.BytesIO(audio_data), 'rb') as wav_file:
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            rate = wav_file.getframerate()
+            raw = wav_file.readframes(wav_file.getnframes())
+        if sample_width in _PCM_DTYPES:
+            dtype, offset, scale = _PCM_DTYPES[sample_width]
+            samples = (np.frombuffer(raw, dtype=dtype).astype(np.float32) - offset) / scale
+            return samples.reshape(-1, channels), rate
+    except (wave.Error, EOFError):
+        pass
+
+    if SOUNDFILE_AVAILABLE:
+        try:
+            samples, rate = sf.read(io.BytesIO(audio_data), dtype='float32', always_2d=True)
+            return samples, rate
+        except Exception:
+            return None
+    return None
+
+
+def decode_audio_blocks(audio_data, block_seconds) -> Optional[Tuple[Iterator[np.ndarray], int, int]]:
+    """Like decode_audio, but yields float32 blocks of ``block_seconds`` for long recordings.
+
+    Returns ``(blocks, rate, total_frames)`` or None if the data can't be
+    decoded, so an hour-long upload is never held as one float array.
+    """
+    try:
+        wav_file = wave.open(io.BytesIO(audio_data), 'rb')
+    except (wave.Error, EOFError):
+        wav_file = None
+    if wav_file is not None and wav_file.getsampwidth() in _PCM_DTYPES:
+        channels, rate = wav_file.getnchannels(), wav_file.getframerate()
+        dtype, offset, scale = _PCM_DTYPES[wav_file.getsampwidth()]
+        block_frames = max(1, int(block_seconds * rate))
+
+        def wav_blocks():
+            with wav_file:
+                while True:
+                    raw = wav_file.readframes(block_frames)
+                    if not raw:
+                        return
+                    samples = (np.frombuffer(raw, dtype=dtype).astype(np.float32) - offset) / scale
+                    yield samples.reshape(-1, channels)
+        return wav_blocks(), rate, wav_file.getnframes()
+
+    if SOUNDFILE_AVAILABLE:
+        try:
+            info = sf.info(io.BytesIO(audio_data))
+            blocks = sf.blocks(io.BytesIO(audio_data), blocksize=max(1, int(block_seconds * info.samplerate)),
+                               dtype='float32', always_2d=True)
+            return blocks, info.samplerate, info.frames
+        except Exception:
+            return None
+    return None
+
+
+# sample width -> (dtype, zero offset, full scale)
+_PCM_DTYPES = {
+    1: (np.uint8, 128.0, 128.0),
+    2: (np.int16, 0.0, 32768.0),
+    4: (np.int32, 0.0, 2147483648.0),
+}
+
+
+def resample(samples, src_rate, dst_rate=TARGET_RATE):
+    """Resample mono float samples with a box anti-alias filter and linear interpolation"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if src_rate > dst_rate:
+        # Average over one output sample period to suppress aliasing
+        width = int(np.ceil(src_rate / dst_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode='same')
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n_out) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def encode_audio(samples, rate=TARGET_RATE, compact=True) -> Tuple[bytes, str]:
+    """Encode mono float samples as FLAC (compact, if soundfile is available) or 16-bit WAV.
+
+    Returns ``(audio_bytes, file_extension)``.
+    """
+    if compact and SOUNDFILE_AVAILABLE:
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, rate, format='FLAC', subtype='PCM_16')
+        return buffer.getvalue(), "flac"
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+    return b''.join((wav_header(len(pcm), rate, 1, SAMPLE_WIDTH), pcm)), "wav"
+
+
+def preprocess_audio(audio_data, compact=True) -> Tuple[bytes, str]:
+    """Downmix and resample audio to 16 kHz mono before upload.
+
+    Returns ``(audio_bytes, file_extension)``. Audio that can't be decoded is
+    passed through unchanged so the API can still try it.
+    """
+    decoded = decode_audio(audio_data)
+    if decoded is None:
+        return audio_data, "wav"
+
+    samples, rate = decoded
+    if samples.shape[1] == 1 and rate == TARGET_RATE and not compact:
+        return audio_data, "wav"  # Already in the target format
+    mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    return encode_audio(resample(mono, rate, TARGET_RATE), TARGET_RATE, compact)
+
+
+class AudioRingBuffer:
+    """Fixed-capacity single-producer / single-consumer buffer for captured PCM.
+
+    The storage is allocated once at twice the capacity and every write is
+    mirrored into both halves, so any unread region is contiguous and reads
+    return ``memoryview`` slices without copying. The lock only guards the
+    position counters and the copy of each small callback block.
+
+    Views stay valid until the writer wraps around onto them, so consume
+    them (e.g. encode the chunk) before more than ``capacity`` bytes arrive.
+    """
+
+    def __init__(self, capacity_bytes=RING_BUFFER_SECONDS * RATE * SAMPLE_WIDTH):
+        self.capacity = capacity_bytes - capacity_bytes % SAMPLE_WIDTH
+        self._buffer = bytearray(self.capacity * 2)
+        self._view = memoryview(self._buffer)
+        self._write_pos = 0
+        self._read_pos = 0
+        self._lock = threading.Lock()
+        self._data_ready = threading.Event()
+        self.overwritten_bytes = 0
+
+    @property
+    def available(self):
+        return self._write_pos - self._read_pos
+
+    def write(self, data):
+        """Append captured audio, overwriting the oldest unread audio when full"""
+        data = memoryview(data)[-self.capacity:]
+        n = len(data)
+        with self._lock:
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            for offset in (start, start + self.capacity):
+                self._view[offset:offset + first] = data[:first]
+            rest = n - first
+            if rest:
+                self._view[0:rest] = data[first:]
+                self._view[self.capacity:self.capacity + rest] = data[first:]
+            self._write_pos += n
+
+            overflow = self._write_pos - self._read_pos - self.capacity
+            if overflow > 0:
+                self._read_pos += overflow
+                self.overwritten_bytes += overflow
+        self._data_ready.set()
+
+    def peek(self, max_bytes=None):
+        """Zero-copy view of unread audio without consuming it"""
+        with self._lock:
+            size = self.available if max_bytes is None else min(max_bytes, self.available)
+            start = self._read_pos % self.capacity
+            return self._view[start:start + size]
+
+    def read(self, max_bytes=None):
+        """Zero-copy view of unread audio, consuming it"""
+        with self._lock:
+            size = self.available if max_bytes is None else min(max_bytes, self.available)
+            start = self._read_pos % self.capacity
+            self._read_pos += size
+            return self._view[start:start + size]
+
+    def wait(self, min_bytes=1, timeout=None):
+        """Block until at least min_bytes are unread or the timeout expires"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.available < min_bytes:
+            self._data_ready.clear()
+            if self.available >= min_bytes:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._data_ready.wait(remaining)
+        return True
+
+    def clear(self):
+        """Discard all unread audio; returns the number of bytes skipped"""
+        with self._lock:
+            skipped = self.available
+            self._read_pos = self._write_pos
+        return skipped
+
+
+@st.cache_resource(show_spinner=False)
+def is_cloud_mode() -> bool:
+    """True when PyAudio is unavailable (no local microphone capture).
+
+    Probed once per process, so reruns can check the mode without importing
+    PyAudio or opening an audio device.
+    """
+    try:
+        import pyaudio  # noqa: F401
+        return False
+    except ImportError:
+        return True
+
+
 class AudioRecorder:
-    def __init__(self):
-        self.is_cloud_mode = not PYAUDIO_AVAILABLE
+    def __init__(self, vad=None, chunker=None):
+        self.is_cloud_mode = is_cloud_mode()
+        self.vad = vad if vad is not None else VoiceActivityDetector()
+        self.chunker = chunker if chunker is not None else EndpointingChunker()
         if not self.is_cloud_mode:
+            # Imported here so cloud deployments and UI reruns never load it
+            import pyaudio
+            self.pyaudio = pyaudio
             self.audio = pyaudio.PyAudio()
             self.stream = None
-            self.audio_queue = queue.Queue()
+            self.ring_buffer = AudioRingBuffer()
         self.is_recording = False
         self.recorded_audio = None
         
@@ -39,6 +501,7 @@ class AudioRecorder:
     
     def _start_cloud_recording(self):
         """Cloud mode: Use streamlit audio recorder"""
+        from audio_recorder_streamlit import audio_recorder
         st.info("🎤 Click the record button below to start recording")
         audio_bytes = audio_recorder(
             text="Click to record",
@@ -58,7 +521,7 @@ class AudioRecorder:
         """Local mode: Use PyAudio"""
         try:
             self.stream = self.audio.open(
-                format=FORMAT,
+                format=self.pyaudio.paInt16,
                 channels=CHANNELS,
                 rate=RATE,
                 input=True,
@@ -78,12 +541,13 @@ class AudioRecorder:
         if not self.is_cloud_mode and self.stream:
             self.stream.stop_stream()
             self.stream.close()
+            self.stream = None  # Stopping twice (pipeline watchdog, then Stop Session) is harmless
         
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """Callback for audio stream (local mode only)"""
         if self.is_recording:
-            self.audio_queue.put(in_data)
-        return (in_data, pyaudio.paContinue)
+            self.ring_buffer.write(in_data)
+        return (in_data, self.pyaudio.paContinue)
     
     def get_audio_chunk(self, duration_seconds=RECORD_SECONDS_CHUNK):
         """Get audio chunk - cloud or local mode"""
@@ -103,29 +567,38 @@ class AudioRecorder:
     
     def _get_local_audio_chunk(self, duration_seconds):
         """Get audio chunk in local mode"""
-        frames = []
-        frames_needed = int(RATE / CHUNK_SIZE * duration_seconds)
-        
-        for _ in range(frames_needed):
-            try:
-                frame = self.audio_queue.get(timeout=0.1)
-                frames.append(frame)
-            except queue.Empty:
-                break
+        if self.chunker:
+            pcm_data = self._get_endpointed_pcm()
+        else:
+            pcm_data = self._get_fixed_pcm(duration_seconds)
         
-        if frames:
-            # Convert to WAV format
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(CHANNELS)
-                wav_file.setsampwidth(self.audio.get_sample_size(FORMAT))
-                wav_file.setframerate(RATE)
-                wav_file.writeframes(b''.join(frames))
-            
-            wav_buffer.seek(0)
-            return wav_buffer.getvalue()
+        if pcm_data:
+            # Skip silent chunks so they never reach the transcription API
+            if self.vad and not self.vad.is_speech(pcm_data):
+                return None
+
+            return pcm_to_wav(pcm_data)
         return None
     
+    def _get_fixed_pcm(self, duration_seconds):
+        """Read a fixed duration of audio from the capture buffer"""
+        bytes_needed = int(RATE * duration_seconds) * SAMPLE_WIDTH
+        self.ring_buffer.wait(bytes_needed, timeout=duration_seconds + 0.1)
+        return self.ring_buffer.read(bytes_needed)
+    
+    def _get_endpointed_pcm(self):
+        """Let the chunker pick a pause in the buffered audio and consume up to it"""
+        if not self.ring_buffer.wait(timeout=0.1) and self.is_recording:
+            return None
+        cut = self.chunker.find_cut(self.ring_buffer.peek())
+        if cut is None:
+            if self.is_recording:
+                self.ring_buffer.wait(self.ring_buffer.available + 1, timeout=0.1)
+                return None
+            # Once recording stops nothing more will arrive; send the tail
+            cut = self.ring_buffer.available
+        return self.ring_buffer.read(cut)
+    
     def cleanup(self):
         """Cleanup audio resources"""
         self.stop_recording()
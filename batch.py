@@ -0,0 +1,167 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_recorder import EndpointingChunker, decode_audio_blocks, pcm_to_wav, resample, RATE, SAMPLE_WIDTH
+from ratelimit import QuotaExceeded
+
+# Configuration
+MAX_UPLOAD_BYTES = 24 * 1024 * 1024   # Below the 25 MB file limit of the Groq and OpenAI transcription APIs
+BATCH_CHUNK_SECONDS = 120      # Chunk length to aim for; shorter chunks spread over more workers
+SILENCE_SEARCH_SECONDS = 20    # How far before the target length a pause may be chosen as the cut
+BATCH_WORKERS = 4              # Chunks transcribed in parallel
+DECODE_BLOCK_SECONDS = 30      # Decoded and resampled at a time, to bound memory on long recordings
+SECTION_SECONDS = 300          # Transcript span per whole-call suggestion request
+
+STAGE_TRANSCRIBE = "transcribe"
+STAGE_SUGGEST = "suggest"
+
+
+def decode_to_pcm(audio_data) -> Optional[np.ndarray]:
+    """Decode a recording to 16 kHz mono int16 samples, block by block; None if it can't be decoded"""
+    decoded = decode_audio_blocks(audio_data, DECODE_BLOCK_SECONDS)
+    if decoded is None:
+        return None
+    blocks, rate, _ = decoded
+    pcm_blocks = []
+    for samples in blocks:
+        mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        pcm_blocks.append((np.clip(resample(mono, rate, RATE), -1.0, 1.0) * 32767).astype(np.int16))
+    return np.concatenate(pcm_blocks) if pcm_blocks else np.zeros(0, dtype=np.int16)
+
+
+def split_at_silences(pcm: np.ndarray, chunk_seconds=BATCH_CHUNK_SECONDS,
+                      search_seconds=SILENCE_SEARCH_SECONDS, max_bytes=MAX_UPLOAD_BYTES) -> List[Tuple[int, int]]:
+    """``(start, end)`` sample ranges covering the recording, cut in pauses.
+
+    Each chunk ends in the latest pause within ``search_seconds`` before
+    the target length, or at the target length if nobody pauses, and stays
+    under ``max_bytes`` even as uncompressed WAV.
+    """
+    max_seconds = min(chunk_seconds, (max_bytes - 44) // SAMPLE_WIDTH // RATE)
+    chunker = EndpointingChunker(
+        min_seconds=max(max_seconds - search_seconds, 1.0), max_seconds=max_seconds, target_seconds=max_seconds
+    )
+    window = int(max_seconds * RATE)
+    pcm_bytes = memoryview(np.ascontiguousarray(pcm, dtype=np.int16)).cast("B")
+    ranges, start = [], 0
+    while start < len(pcm):
+        cut = chunker.find_cut(pcm_bytes[start * SAMPLE_WIDTH:(start + window) * SAMPLE_WIDTH])
+        end = start + cut // SAMPLE_WIDTH if cut else len(pcm)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class BatchTranscriber:
+    """Transcribes a recorded call after the fact, many chunks at once.
+
+    The recording is decoded to 16 kHz mono and cut at pauses into chunks
+    that fit the upload limit. A worker pool transcribes the chunks, each
+    one through ``TranscriptionService`` (so retries, failover and the
+    shared quota apply), and the texts are stitched back in order at their
+    chunk's offset. Suggestions are then requested per ``SECTION_SECONDS``
+    of transcript, covering the whole call. Both services should be created
+    with ``PRIORITY_BATCH``, so the recording waits for quota behind live
+    sessions instead of holding up their transcription or being shed.
+    """
+
+    def __init__(self, transcription_service, llm_assistant, workers=BATCH_WORKERS,
+                 chunk_seconds=BATCH_CHUNK_SECONDS):
+        self.transcription_service = transcription_service
+        self.llm_assistant = llm_assistant
+        self.workers = max(1, int(workers))
+        self.chunk_seconds = chunk_seconds
+
+    def run(self, audio_data, on_progress: Optional[Callable[[str, int, int], None]] = None) -> Optional[Dict]:
+        """Transcribe and suggest for a whole recording.
+
+        ``on_progress(stage, done, total)`` is called from the calling thread
+        as chunks and sections finish. Returns None if the audio can't be
+        decoded, otherwise ``transcript`` and ``suggestions`` as
+        ``(offset_ms, ...)`` pairs, the ``errors`` of failed requests, the
+        offsets of ``unsuggested_sections`` (shed or failed) and timing stats.
+        """
+        start = time.perf_counter()
+        pcm = decode_to_pcm(audio_data)
+        if pcm is None:
+            return None
+        ranges = split_at_silences(pcm, self.chunk_seconds)
+        decoded = time.perf_counter()
+
+        texts = [None] * len(ranges)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-stt") as executor:
+            futures = {
+                executor.submit(self._transcribe_chunk, pcm, chunk_start, chunk_end): index
+                for index, (chunk_start, chunk_end) in enumerate(ranges)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    texts[futures[future]] = future.result()
+                except Exception as e:
+                    errors.append(f"Transcription error: {e}")
+                if on_progress:
+                    on_progress(STAGE_TRANSCRIBE, done, len(ranges))
+        transcript = [
+            (chunk_start * 1000 // RATE, text.strip())
+            for (chunk_start, _), text in zip(ranges, texts) if text and text.strip()
+        ]
+        transcribed = time.perf_counter()
+
+        suggestions, sections, missing_sections = self._suggest(transcript, on_progress, errors)
+        finished = time.perf_counter()
+        return {
+            "transcript": transcript,
+            "suggestions": suggestions,
+            "chunks": len(ranges),
+            "failed_chunks": sum(1 for text in texts if text is None),
+            "errors": errors,
+            "sections": sections,
+            "unsuggested_sections": missing_sections,
+            "audio_seconds": len(pcm) / RATE,
+            "decode_seconds": decoded - start,
+            "transcribe_seconds": transcribed - decoded,
+            "suggest_seconds": finished - transcribed,
+            "wall_seconds": finished - start,
+        }
+
+    def _transcribe_chunk(self, pcm: np.ndarray, start: int, end: int) -> Optional[str]:
+        # Encoded in the worker, so only the chunks in flight exist as WAV at once
+        return self.transcription_service.transcribe_audio(pcm_to_wav(pcm[start:end].tobytes()))
+
+    def _suggest(self, transcript: List[Tuple[int, str]], on_progress, errors: List[str]):
+        """Structured suggestions for each section of the call, at the section's offset.
+
+        Returns ``(suggestions, section count, offsets of sections that got
+        no answer)``.
+        """
+        sections: Dict[int, List[str]] = {}
+        for offset_ms, text in transcript:
+            sections.setdefault(offset_ms // (SECTION_SECONDS * 1000), []).append(text)
+        if not sections:
+            return [], 0, []
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-llm") as executor:
+            futures = {
+                executor.submit(self.llm_assistant.get_structured_suggestions, " ".join(texts), raise_shed=True): section
+                for section, texts in sections.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    results[futures[future]] = future.result()
+                except QuotaExceeded:
+                    pass
+                except Exception as e:
+                    errors.append(f"LLM error: {e}")
+                if on_progress:
+                    on_progress(STAGE_SUGGEST, done, len(sections))
+        suggestions = [
+            (section * SECTION_SECONDS * 1000, suggestion)
+            for section in sorted(results) for suggestion in results[section]
+        ]
+        missing = [section * SECTION_SECONDS * 1000 for section in sorted(sections) if section not in results]
+        return suggestions, len(sections), missing
@@ -0,0 +1,91 @@
+"""Size and load time: JSON session export vs. the compact session archive.
+
+Usage:
+    python benchmarks/archive_benchmark.py [--hours 1] [--sessions 100]
+
+Synthesizes a call (one transcript entry every 2.5 s, a suggestion every
+20 s), writes it both as the existing pretty-printed ``session_data`` JSON
+and with ``write_archive``, and times loading each ``--sessions`` times,
+as when reviewing many past calls. The archive is also loaded header-only,
+transcript-only and suggestions-only, and written with an uncompressed
+transcript for comparison.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import ArchiveReader, write_archive  # noqa: E402
+from transcript_store import format_entry  # noqa: E402
+
+WORDS = ("we", "are", "looking", "at", "the", "pricing", "for", "next", "quarter", "and", "our", "team",
+         "needs", "a", "better", "way", "to", "track", "deals", "budget", "contract", "timeline", "demo")
+
+
+def synth_session(hours):
+    rng = random.Random(0)
+    start_ms = int(time.time() * 1000)
+    transcript = [
+        (start_ms + i * 2500, " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))))
+        for i in range(int(hours * 3600 / 2.5))
+    ]
+    suggestions = [
+        {"timestamp": format_entry(start_ms + i * 20000, "")["timestamp"],
+         "text": "💡 Tip: " + " ".join(rng.choice(WORDS) for _ in range(15)), "source": "llm"}
+        for i in range(int(hours * 3600 / 20))
+    ]
+    session_info = {"start_time": "2024-01-01T10:00:00", "export_time": "2024-01-01T11:00:00"}
+    return transcript, suggestions, session_info
+
+
+def time_loads(load, sessions):
+    start = time.perf_counter()
+    for _ in range(sessions):
+        load()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=1.0, help="Call length to synthesize")
+    parser.add_argument("--sessions", type=int, default=100, help="Times each file is loaded")
+    args = parser.parse_args()
+
+    transcript, suggestions, session_info = synth_session(args.hours)
+    session_data = {
+        "session_info": session_info,
+        "transcript": [format_entry(time_ms, text) for time_ms, text in transcript],
+        "suggestions": suggestions,
+    }
+    json_bytes = json.dumps(session_data, indent=2).encode("utf-8")
+    archive_bytes = write_archive(transcript, suggestions, session_info)
+    raw_archive_bytes = write_archive(transcript, suggestions, session_info, compress_transcript=False)
+
+    print(f"{len(transcript)} transcript entries, {len(suggestions)} suggestions; "
+          f"load times for {args.sessions} sessions")
+    print(f"{'format':<32}{'bytes':>12}{'load ms':>12}")
+    print(f"{'JSON (indent=2)':<32}{len(json_bytes):>12}"
+          f"{time_loads(lambda: json.loads(json_bytes), args.sessions):>12.1f}")
+    print(f"{'archive, full':<32}{len(archive_bytes):>12}"
+          f"{time_loads(lambda: ArchiveReader(archive_bytes).to_session_data(), args.sessions):>12.1f}")
+    print(f"{'archive, raw columns':<32}{'':>12}"
+          f"{time_loads(lambda: (ArchiveReader(archive_bytes).transcript(), ArchiveReader(archive_bytes).suggestions()), args.sessions):>12.1f}")
+    print(f"{'archive, header only':<32}{'':>12}"
+          f"{time_loads(lambda: ArchiveReader(archive_bytes).session_info, args.sessions):>12.1f}")
+    print(f"{'archive, transcript only':<32}{'':>12}"
+          f"{time_loads(lambda: ArchiveReader(archive_bytes).transcript(), args.sessions):>12.1f}")
+    print(f"{'archive, suggestions only':<32}{'':>12}"
+          f"{time_loads(lambda: ArchiveReader(archive_bytes).suggestions(), args.sessions):>12.1f}")
+    print(f"{'raw transcript archive, full':<32}{len(raw_archive_bytes):>12}"
+          f"{time_loads(lambda: ArchiveReader(raw_archive_bytes).to_session_data(), args.sessions):>12.1f}")
+    print(f"{'raw transcript, transcript only':<32}{'':>12}"
+          f"{time_loads(lambda: ArchiveReader(raw_archive_bytes).transcript(), args.sessions):>12.1f}")
+    print(f"size ratio {len(json_bytes) / len(archive_bytes):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
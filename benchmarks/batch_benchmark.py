@@ -0,0 +1,111 @@
+"""Throughput of batch transcription: audio-minutes processed per wall-clock minute.
+
+Usage:
+    python benchmarks/batch_benchmark.py [--minutes 60] [--workers 1 2 4 8] [--rate 16000] [--channels 1]
+                                         [--stt-base 0.4] [--stt-factor 0.01] [--llm-seconds 0.8] [--real]
+
+Synthesizes a recording of speech-like bursts separated by pauses, then
+runs ``BatchTranscriber`` over it with each worker count. By default the
+transcription and LLM services are simulated: a request takes
+``--stt-base + --stt-factor * audio_seconds`` and ``--llm-seconds``, so the
+numbers show decode/split overhead and how parallelism hides request
+latency without API keys. ``--real`` uses the configured services instead.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_recorder import wav_duration  # noqa: E402
+from batch import BatchTranscriber, decode_to_pcm, split_at_silences  # noqa: E402
+
+
+def synth_recording(minutes, rate, channels):
+    """16-bit WAV: noise bursts of 1-8 s ("speech") with 0.3-1.5 s pauses"""
+    rng = np.random.default_rng(0)
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        remaining = int(minutes * 60 * rate)
+        speaking = True
+        while remaining:
+            length = min(int(rng.uniform(1, 8) * rate if speaking else rng.uniform(0.3, 1.5) * rate), remaining)
+            level = 0.2 if speaking else 0.001
+            samples = (rng.standard_normal((length, channels)) * level * 32767).clip(-32768, 32767)
+            wav_file.writeframes(samples.astype("<i2").tobytes())
+            remaining -= length
+            speaking = not speaking
+    return output.getvalue()
+
+
+class SimulatedTranscription:
+    def __init__(self, base, factor):
+        self.base, self.factor = base, factor
+
+    def transcribe_audio(self, audio_data):
+        time.sleep(self.base + self.factor * wav_duration(audio_data))
+        return "we are looking at the pricing for next quarter"
+
+
+class SimulatedAssistant:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def get_structured_suggestions(self, transcript_chunk, raise_shed=False):
+        time.sleep(self.seconds)
+        return [{"category": "tip", "text": "💡 Tip: anchor on ROI", "priority": 0.5}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60.0, help="Recording length to synthesize")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rate", type=int, default=16000, help="Sample rate of the synthesized recording")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--stt-base", type=float, default=0.4, help="Simulated seconds per transcription request")
+    parser.add_argument("--stt-factor", type=float, default=0.01, help="Simulated seconds per second of audio")
+    parser.add_argument("--llm-seconds", type=float, default=0.8, help="Simulated seconds per suggestion request")
+    parser.add_argument("--real", action="store_true", help="Use the configured transcription and LLM services")
+    args = parser.parse_args()
+
+    audio_data = synth_recording(args.minutes, args.rate, args.channels)
+    start = time.perf_counter()
+    pcm = decode_to_pcm(audio_data)
+    decoded = time.perf_counter()
+    ranges = split_at_silences(pcm)
+    split = time.perf_counter()
+    lengths = [(end - begin) / 16000 for begin, end in ranges]
+    print(f"{args.minutes:g} min recording, {len(audio_data) / 1e6:.1f} MB WAV at {args.rate} Hz x {args.channels}")
+    print(f"decode {(decoded - start) * 1000:.0f} ms, split {(split - decoded) * 1000:.0f} ms: "
+          f"{len(ranges)} chunks of {min(lengths):.0f}-{max(lengths):.0f} s")
+
+    if args.real:
+        from dotenv import load_dotenv
+        from llm_assistant import LLMAssistant
+        from ratelimit import PRIORITY_BATCH
+        from transcription import TranscriptionService
+        load_dotenv()
+        transcription_service = TranscriptionService("groq", priority=PRIORITY_BATCH)
+        llm_assistant = LLMAssistant("groq", priority=PRIORITY_BATCH)
+    else:
+        transcription_service = SimulatedTranscription(args.stt_base, args.stt_factor)
+        llm_assistant = SimulatedAssistant(args.llm_seconds)
+
+    print(f"{'workers':>8}{'wall s':>10}{'transcribe s':>14}{'suggest s':>11}{'audio-min/min':>15}")
+    for workers in args.workers:
+        result = BatchTranscriber(transcription_service, llm_assistant, workers=workers).run(audio_data)
+        throughput = result["audio_seconds"] / result["wall_seconds"]
+        print(f"{workers:>8}{result['wall_seconds']:>10.1f}{result['transcribe_seconds']:>14.1f}"
+              f"{result['suggest_seconds']:>11.1f}{throughput:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Bytes-per-request and upload time before vs. after audio preprocessing.
+
+Usage:
+    python benchmarks/preprocess_benchmark.py [--seconds 10] [--uplink-mbps 2] [--live]
+
+Synthesizes speech-like 44.1/48 kHz stereo WAV chunks, runs them through
+``preprocess_audio`` and reports payload size, preprocessing time and the
+upload time at the given uplink speed. With ``--live`` (and an API key in
+the environment) it also times real transcription requests for both payloads.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_recorder import preprocess_audio, wav_header, SOUNDFILE_AVAILABLE  # noqa: E402
+
+
+def synth_wav(seconds, rate, channels):
+    """Voiced harmonics with syllable-rate amplitude modulation and some noise"""
+    t = np.arange(int(seconds * rate)) / rate
+    voice = sum(np.sin(2 * np.pi * f0 * t) / (i + 1) for i, f0 in enumerate((140, 280, 420, 560, 700)))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) * (np.sin(2 * np.pi * 0.3 * t) > -0.5)
+    mono = 0.3 * voice * envelope + 0.01 * np.random.default_rng(0).normal(size=len(t))
+    samples = np.repeat(mono[:, None], channels, axis=1)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+    return b''.join((wav_header(len(pcm), rate, channels, 2), pcm))
+
+
+def time_call(fn, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def live_request(audio_bytes, service):
+    from transcription import TranscriptionService
+    transcriber = TranscriptionService(service, preprocess=False)
+    start = time.perf_counter()
+    transcriber.transcribe_audio(audio_bytes)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Chunk length to synthesize")
+    parser.add_argument("--uplink-mbps", type=float, default=2.0, help="Uplink speed for the upload estimate")
+    parser.add_argument("--live", action="store_true", help="Also time real transcription requests")
+    parser.add_argument("--service", default="groq", choices=["groq", "openai"])
+    args = parser.parse_args()
+
+    bytes_per_second = args.uplink_mbps * 1e6 / 8
+    print(f"{args.seconds:.0f}s chunks, uplink {args.uplink_mbps} Mbit/s, FLAC available: {SOUNDFILE_AVAILABLE}")
+    print(f"{'input':<18}{'output':<12}{'bytes':>12}{'ratio':>8}{'prep ms':>10}{'upload ms':>11}")
+
+    for rate, channels in ((48000, 2), (44100, 2), (16000, 1)):
+        original = synth_wav(args.seconds, rate, channels)
+        label = f"{rate / 1000:g}k/{channels}ch wav"
+        print(f"{label:<18}{'original':<12}{len(original):>12}{1:>8.2f}{0:>10.1f}"
+              f"{len(original) / bytes_per_second * 1000:>11.0f}")
+        if args.live:
+            print(f"{'':<18}live request: {live_request(original, args.service) * 1000:.0f} ms")
+        for compact in (False, True):
+            (payload, file_format), seconds = time_call(lambda: preprocess_audio(original, compact))
+            print(f"{'':<18}{'16k ' + file_format:<12}{len(payload):>12}{len(original) / len(payload):>8.2f}"
+                  f"{seconds * 1000:>10.1f}{len(payload) / bytes_per_second * 1000:>11.0f}")
+
+            if args.live:
+                print(f"{'':<18}live request: {live_request(payload, args.service) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cold start and per-rerun overhead of the Streamlit app.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--imports 5] [--reruns 20]
+
+Cold start: times ``import app`` in fresh interpreters (what a new server
+process pays before the first page renders). Reruns: drives ``app.py``
+with Streamlit's ``AppTest`` and times the first script run of a session
+and the reruns after it (what every UI refresh pays).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def cold_import_seconds():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def rerun_seconds(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    app_test = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=30)
+    start = time.perf_counter()
+    app_test.run()
+    first = time.perf_counter() - start
+
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app_test.run()
+        timings.append(time.perf_counter() - start)
+    return first, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imports", type=int, default=5, help="Fresh interpreters to time the import in")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns to time after the first run")
+    args = parser.parse_args()
+
+    imports = [cold_import_seconds() for _ in range(args.imports)]
+    print(f"cold import   median {statistics.median(imports) * 1000:7.1f} ms   "
+          f"min {min(imports) * 1000:7.1f} ms   ({args.imports} runs)")
+
+    sys.path.insert(0, ROOT)
+    first, reruns = rerun_seconds(args.reruns)
+    print(f"first run     {first * 1000:7.1f} ms")
+    print(f"rerun         median {statistics.median(reruns) * 1000:7.1f} ms   "
+          f"max {max(reruns) * 1000:7.1f} ms   ({args.reruns} reruns)")
+
+
+if __name__ == "__main__":
+    main()
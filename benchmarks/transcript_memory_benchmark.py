@@ -0,0 +1,92 @@
+"""Memory of a simulated 3-hour call: list of dicts vs. TranscriptStore.
+
+Usage:
+    python benchmarks/transcript_memory_benchmark.py [--hours 3] [--entry-seconds 2.5] [--memory-entries 2000]
+
+Generates one transcript entry every ``--entry-seconds`` of call time and
+measures, with tracemalloc, the memory held by the original representation
+(a list of ``{"timestamp": "%H:%M:%S", "text": ...}`` dicts) and by
+``TranscriptStore``. Also times appends and reading the recent window.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore, format_entry  # noqa: E402
+
+WORDS = ("we", "are", "looking", "at", "the", "pricing", "for", "next", "quarter", "and", "our", "team",
+         "needs", "a", "better", "way", "to", "track", "deals", "budget", "contract", "timeline", "demo")
+
+
+def synth_entries(hours, entry_seconds):
+    rng = random.Random(0)
+    start_ms = int(time.time() * 1000)
+    count = int(hours * 3600 / entry_seconds)
+    return [
+        (start_ms + int(i * entry_seconds * 1000), " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))))
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--entry-seconds", type=float, default=2.5, help="Call time per transcript entry")
+    parser.add_argument("--memory-entries", type=int, default=2000, help="TranscriptStore in-memory cap")
+    args = parser.parse_args()
+
+    entries = synth_entries(args.hours, args.entry_seconds)
+    # Texts exist before either structure is built; count only what each structure adds
+    print(f"{len(entries)} entries over {args.hours:g} h, "
+          f"{sum(len(text) for _, text in entries) / 1024:.0f} KiB of text")
+    print(f"{'representation':<28}{'held KiB':>10}{'peak KiB':>10}{'build ms':>10}{'recent(20) us':>15}")
+
+    dicts, current, peak, elapsed = measure(lambda: [format_entry(ms, text) for ms, text in entries])
+    start = time.perf_counter()
+    for _ in range(1000):
+        dicts[-20:]
+    recent_us = (time.perf_counter() - start) * 1000
+    print(f"{'list of dicts':<28}{current / 1024:>10.0f}{peak / 1024:>10.0f}{elapsed * 1000:>10.1f}{recent_us:>15.1f}")
+    del dicts
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        def build_store():
+            store = TranscriptStore(memory_entries=args.memory_entries, spill_dir=spill_dir)
+            for ms, text in entries:
+                store.append(text, ms)
+            return store
+
+        store, current, peak, elapsed = measure(build_store)
+        start = time.perf_counter()
+        for _ in range(1000):
+            store.recent(20)
+        recent_us = (time.perf_counter() - start) * 1000
+        spill_kib = sum(os.path.getsize(os.path.join(spill_dir, name)) for name in os.listdir(spill_dir)) / 1024
+        print(f"{'TranscriptStore':<28}{current / 1024:>10.0f}{peak / 1024:>10.0f}{elapsed * 1000:>10.1f}"
+              f"{recent_us:>15.1f}")
+        print(f"  {store.spilled} entries spilled to disk ({spill_kib:.0f} KiB), "
+              f"{len(store) - store.spilled} in memory")
+        start = time.perf_counter()
+        exported = sum(1 for _ in store.entries())
+        print(f"  full read-back of {exported} entries: {(time.perf_counter() - start) * 1000:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
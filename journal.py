@@ -0,0 +1,214 @@
+import io
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from archive import write_archive
+from transcript_store import format_entry
+
+# Configuration
+JOURNAL_DIR = os.getenv("SESSION_JOURNAL_DIR", "sessions")  # Where session journals are written
+JOURNAL_PREFIX = "session_"
+HEARTBEAT_INTERVAL = 15     # Seconds between touches of an open journal, so others can see it is live
+STALE_AFTER = 60            # An unfinished journal untouched this long has no live session behind it
+SCAN_INTERVAL = 10          # Seconds a directory scan for recoverable journals is reused across reruns
+
+# Journals open in this process; held weakly so a discarded session stops its heartbeat
+_open_journals = weakref.WeakSet()
+_heartbeat_lock = threading.Lock()
+_heartbeat_thread = None
+_scan_cache: Dict[str, tuple] = {}  # directory -> (scanned at, paths)
+
+
+def read_journal(path: str) -> Iterator[Dict]:
+    """Yield the records of a journal, skipping a torn last line from a crash"""
+    with open(path, encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def is_finished(path: str) -> bool:
+    """True if the journal ends with an ``end`` record (reads only the tail of the file)"""
+    with open(path, "rb") as journal_file:
+        journal_file.seek(0, os.SEEK_END)
+        journal_file.seek(max(journal_file.tell() - 4096, 0))
+        lines = journal_file.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line).get("type") == "end"
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            continue
+    return False
+
+
+def is_live(path: str) -> bool:
+    """True if a session may still be writing the journal: open in this process or recently touched"""
+    if any(journal.path == path for journal in list(_open_journals)):
+        return True
+    try:
+        return time.time() - os.path.getmtime(path) < STALE_AFTER
+    except OSError:
+        return False
+
+
+def is_recoverable(path: str) -> bool:
+    """An unfinished journal that no live session is writing to"""
+    return os.path.exists(path) and not is_live(path) and not is_finished(path)
+
+
+def unfinished_journals(directory: str = JOURNAL_DIR) -> List[str]:
+    """Journals of sessions that never stopped cleanly (e.g. the browser or server crashed), newest first.
+
+    Journals still being written by another session (on this or another
+    server process) are left out: open journals are touched every
+    HEARTBEAT_INTERVAL, and only those idle for STALE_AFTER are offered. The
+    scan is reused for SCAN_INTERVAL, so reruns don't reread every file.
+    """
+    cached = _scan_cache.get(directory)
+    if cached and time.monotonic() - cached[0] < SCAN_INTERVAL:
+        return [path for path in cached[1] if os.path.exists(path)]
+    paths = []
+    if os.path.isdir(directory):
+        paths = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith(JOURNAL_PREFIX) and name.endswith(".ndjson")
+        ]
+        paths = sorted((path for path in paths if is_recoverable(path)), key=os.path.getmtime, reverse=True)
+    _scan_cache[directory] = (time.monotonic(), paths)
+    return list(paths)
+
+
+def clear_scan_cache():
+    _scan_cache.clear()
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        for journal in list(_open_journals):
+            journal.heartbeat()
+
+
+def _register(journal):
+    global _heartbeat_thread
+    _open_journals.add(journal)
+    with _heartbeat_lock:
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="journal-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+class SessionJournal:
+    """Append-only NDJSON journal of one session, written as results arrive.
+
+    Every transcript entry and suggestion is flushed to disk as one line, so
+    a crashed browser or server loses nothing that was already shown. While
+    open, the file is touched every HEARTBEAT_INTERVAL so it is not offered
+    for recovery to other sessions, and
+    ``export_json()`` builds the download from the file instead of from
+    session state. Records are ``{"type": "session" | "transcript" |
+    "suggestion" | "end", ...}``.
+    """
+
+    def __init__(self, path: Optional[str] = None, directory: str = JOURNAL_DIR):
+        if path is None:
+            os.makedirs(directory, exist_ok=True)
+            name = f"{JOURNAL_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.ndjson"
+            path = os.path.join(directory, name)
+        is_new = not os.path.exists(path)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        if is_new:
+            self.start_time = datetime.now().isoformat()
+            self._write({"type": "session", "start_time": self.start_time})
+        else:
+            # Reopened for recovery: keep appending to the same session
+            self.start_time = next(
+                (record.get("start_time") for record in read_journal(path) if record.get("type") == "session"), None
+            )
+        _register(self)
+
+    def add_transcript(self, time_ms: int, text: str):
+        self._write({"type": "transcript", "time_ms": time_ms, "text": text})
+
+    def add_suggestion(self, suggestion: Dict):
+        self._write(dict(suggestion, type="suggestion"))
+
+    def heartbeat(self):
+        """Touch the file so other sessions see it is still being recorded"""
+        with self._lock:
+            if self._file.closed:
+                return
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def close(self):
+        """Mark the session as finished so it is not offered for recovery"""
+        with self._lock:
+            if self._file.closed:
+                return
+        self._write({"type": "end", "end_time": datetime.now().isoformat()})
+        with self._lock:
+            self._file.close()
+        _open_journals.discard(self)
+
+    def load(self):
+        """Transcript ``(time_ms, text)`` pairs and suggestions recorded so far"""
+        transcript, suggestions = [], []
+        for record in read_journal(self.path):
+            if record.get("type") == "transcript":
+                transcript.append((record["time_ms"], record["text"]))
+            elif record.get("type") == "suggestion":
+                suggestions.append({key: value for key, value in record.items() if key != "type"})
+        return transcript, suggestions
+
+    def export_json(self) -> bytes:
+        """The session export (same layout as before), streamed from the journal.
+
+        Meant to be passed uncalled to ``st.download_button(data=...)`` so it
+        only runs when the user clicks download.
+        """
+        session_info = {"start_time": self.start_time, "export_time": datetime.now().isoformat()}
+        output = io.StringIO()
+        output.write('{\n  "session_info": ' + json.dumps(session_info, indent=2).replace("\n", "\n  "))
+        for section, record_type in (("transcript", "transcript"), ("suggestions", "suggestion")):
+            output.write(f',\n  "{section}": [')
+            first = True
+            for record in read_journal(self.path):
+                if record.get("type") != record_type:
+                    continue
+                if record_type == "transcript":
+                    entry = format_entry(record["time_ms"], record["text"])
+                else:
+                    entry = {key: value for key, value in record.items() if key != "type"}
+                output.write(("\n    " if first else ",\n    ") + json.dumps(entry, indent=2).replace("\n", "\n    "))
+                first = False
+            output.write("\n  ]" if not first else "]")
+        output.write("\n}")
+        return output.getvalue().encode("utf-8")
+
+    def export_archive(self) -> bytes:
+        """The session in the compact archive format (see archive.py), built on demand"""
+        transcript, suggestions = self.load()
+        return write_archive(
+            transcript, suggestions, {"start_time": self.start_time, "export_time": datetime.now().isoformat()}
+        )
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
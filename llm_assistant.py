@@ -1,25 +1,297 @@
-import streamlit as st
-import os
-import openai
-from groq import Groq
-from typing import List
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from playbook import PLAYBOOK_TOKEN_BUDGET, get_playbook_index
+from providers import ProviderRouter, get_client_pool, provider_order
+from ratelimit import PRIORITY_SUGGESTION, SHARED_RATE_LIMITER, QuotaExceeded
 import random
 
+NO_SUGGESTION = "No suggestions at this time."
+LATENCY_WINDOW = 50  # Suggestion requests kept for latency stats
+CACHE_SIZE = 256     # Transcript windows remembered by the suggestion cache
+CACHE_TTL = 120      # Seconds before a cached suggestion is requested again
+CONTEXT_TOKEN_BUDGET = 400  # Prompt tokens for call summary + recent transcript
+MIN_RECENT_ENTRIES = 3      # Transcript entries always kept verbatim
+SUMMARY_MAX_TOKENS = 150
+STRUCTURED_MAX_TOKENS = 300  # Room for one suggestion per category
+
+SUMMARY_PROMPT = """You maintain a running summary of a live sales call for a sales assistant.
+Update the summary with the new transcript lines. Keep facts that matter for selling:
+the customer's needs, objections, budget, timeline, competitors and agreed next steps.
+Reply with the updated summary only, in at most 80 words."""
+
+# Mock suggestions for demo
+MOCK_SUGGESTIONS = [
+    "💡 Tip: Ask about their current challenges",
+    "⚠️ Reminder: Mention the ROI benefits",
+    "❗ Alert: Customer mentioned budget concerns",
+    "🎯 Close: Good time to ask for next steps"
+]
+
+class SuggestionCache:
+    """LRU cache with TTL for suggestions, keyed on a normalized transcript window.
+
+    Windows that differ only in case, punctuation or spacing share an entry,
+    so repeated context (silence, identical re-sends) never triggers another
+    paid round trip. Empty results are cached too.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, suggestions)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = re.sub(r"[^\w\s]", " ", text.lower())
+        return " ".join(text.split())
+
+    def key(self, model: str, prompt: str, transcript_chunk: str) -> str:
+        material = "\x1f".join((model, prompt, self.normalize(transcript_chunk)))
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: str, suggestions: List[str]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), list(suggestions))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+CHAT_MODELS = {
+    "groq": "llama3-8b-8192",   # Groq's fast Llama model
+    "openai": "gpt-4o-mini",
+}
+
+# category -> (emoji, label)
+CATEGORIES = {
+    "tip": ("💡", "Tip"),
+    "reminder": ("⚠️", "Reminder"),
+    "alert": ("❗", "Alert"),
+    "close": ("🎯", "Close"),
+}
+DEFAULT_PRIORITY = 0.5
+
+
+def parse_structured_suggestions(content: str) -> List[Dict]:
+    """Parse and validate a JSON suggestion list, highest priority first.
+
+    Invalid items are skipped. If the reply isn't JSON at all, each
+    non-empty line is treated as a plain suggestion and its category is
+    read from the leading emoji, so a malformed reply still shows something.
+    """
+    content = content.strip()
+    data = None
+    try:
+        data = json.loads(content)
+    except ValueError:
+        # Models sometimes wrap the JSON in prose or code fences
+        start, end = content.find("{"), content.rfind("}")
+        if 0 <= start < end:
+            try:
+                data = json.loads(content[start:end + 1])
+            except ValueError:
+                data = None
+
+    if data is None:
+        items = [{"text": line} for line in content.splitlines()
+                 if line.strip() and line.strip() != NO_SUGGESTION]
+    elif isinstance(data, dict):
+        items = data.get("suggestions", [])
+    else:
+        items = data
+    if not isinstance(items, list):
+        return []
+
+    suggestions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        text = item.get("text")
+        if not isinstance(text, str) or not text.strip():
+            continue
+        text = text.strip()
+        category = str(item.get("category", "")).lower().strip()
+        if category not in CATEGORIES:
+            category = next((name for name, (emoji, _) in CATEGORIES.items() if text.startswith(emoji)), "tip")
+        try:
+            priority = min(max(float(item.get("priority", DEFAULT_PRIORITY)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            priority = DEFAULT_PRIORITY
+        emoji, label = CATEGORIES[category]
+        if not text.startswith(emoji):
+            text = f"{emoji} {label}: {text}"
+        suggestions.append({"category": category, "text": text, "priority": priority})
+
+    suggestions.sort(key=lambda suggestion: suggestion["priority"], reverse=True)
+    return suggestions
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+class ConversationContext:
+    """Rolling summary of older turns plus the raw recent tail, under a token budget.
+
+    Every transcript entry is appended raw. Once the raw entries no longer
+    fit in the budget left after the summary, the oldest ones are folded
+    into the summary by ``summarize_fn(previous_summary, texts)`` on a
+    background thread, so the suggestion path never waits for it. A fold
+    that finishes after ``clear()`` is discarded.
+    """
+
+    def __init__(self, summarize_fn=None, token_budget=CONTEXT_TOKEN_BUDGET,
+                 min_recent_entries=MIN_RECENT_ENTRIES):
+        self.summarize_fn = summarize_fn or self._truncate_summary
+        self.token_budget = token_budget
+        self.min_recent_entries = min_recent_entries
+        self.summary = ""
+        self.entries = deque()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self._summarizing = False
+        self._generation = 0    # Bumped by clear(), so a fold in flight knows its entries are gone
+
+    def add(self, text: str):
+        """Append a transcript entry, scheduling a summary update when over budget"""
+        with self._lock:
+            self.entries.append(text)
+            start_summary = not self._summarizing and self._over_budget()
+            if start_summary:
+                self._summarizing = True
+        if start_summary:
+            self._executor.submit(self._fold_oldest)
+
+    def window(self):
+        """Return ``(summary, recent_text)`` fitting in the token budget"""
+        with self._lock:
+            budget = self._raw_budget()
+            tail = []
+            used = 0
+            for text in reversed(self.entries):
+                tokens = estimate_tokens(text) + 1
+                if tail and used + tokens > budget:
+                    break
+                tail.append(text)
+                used += tokens
+            return self.summary, " ".join(reversed(tail))
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.entries.clear()
+            self._generation += 1
+
+    def _raw_budget(self) -> int:
+        # The summary never takes more than half of the budget
+        return self.token_budget - min(estimate_tokens(self.summary), self.token_budget // 2)
+
+    def _over_budget(self) -> bool:
+        if len(self.entries) <= self.min_recent_entries:
+            return False
+        return sum(estimate_tokens(text) + 1 for text in self.entries) > self._raw_budget()
+
+    def _fold_oldest(self):
+        """Summarize the oldest entries until the raw tail uses at most half its budget"""
+        try:
+            with self._lock:
+                target = self._raw_budget() // 2
+                remaining = sum(estimate_tokens(text) + 1 for text in self.entries)
+                count = 0
+                while len(self.entries) - count > self.min_recent_entries and remaining > target:
+                    remaining -= estimate_tokens(self.entries[count]) + 1
+                    count += 1
+                texts = [self.entries[i] for i in range(count)]
+                previous_summary = self.summary
+                generation = self._generation
+
+            if not texts:
+                return
+            try:
+                summary = self.summarize_fn(previous_summary, texts)
+            except Exception:
+                summary = None
+            if not summary:
+                summary = self._truncate_summary(previous_summary, texts)
+
+            with self._lock:
+                if generation != self._generation:
+                    return
+                # Entries are only appended while folding, so the summarized ones are still at the front
+                for text in texts:
+                    if not self.entries or self.entries[0] is not text:
+                        break
+                    self.entries.popleft()
+                self.summary = summary
+        finally:
+            with self._lock:
+                self._summarizing = False
+                start_summary = self._over_budget()
+                if start_summary:
+                    self._summarizing = True
+            if start_summary:
+                self._executor.submit(self._fold_oldest)
+
+    def _truncate_summary(self, previous_summary: str, texts: List[str]) -> str:
+        """Fallback without an LLM: keep the most recent text that fits half the budget"""
+        combined = " ".join([previous_summary] + texts).strip()
+        max_chars = self.token_budget // 2 * 4
+        return combined[-max_chars:]
+
+
 class LLMAssistant:
-    def __init__(self, model_type="groq"):
+    def __init__(self, model_type="groq", cache=None, failover=True, hedge=False, rate_limiter=None,
+                 client_pool=None, playbook=None, priority=PRIORITY_SUGGESTION):
         self.model_type = model_type
-        self.openai_client = None
-        self.groq_client = None
-        self.conversation_context = []
+        self.conversation_context = ConversationContext(summarize_fn=self.summarize)
+        self.prompt_tokens = deque(maxlen=LATENCY_WINDOW)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.cancelled_requests = 0
+        self.saved_seconds = 0.0
+        self.cache = cache if cache is not None else SuggestionCache()
+        # Built once per process; only the snippets relevant to each window go into the prompt
+        self.playbook = playbook if playbook is not None else get_playbook_index()
+        self.playbook_lookups = deque(maxlen=LATENCY_WINDOW)
         
-        if model_type == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if api_key:
-                self.groq_client = Groq(api_key=api_key)
-        elif model_type == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
+        # The selected model comes first; the other provider is only a fallback
+        providers = provider_order(model_type) if failover else [model_type]
+        # Clients come from the process-wide pool so sessions share warm connections
+        self.client_pool = client_pool if client_pool is not None else get_client_pool()
+        self.clients = {}
+        for provider in providers:
+            client = self.client_pool.get(provider)
+            if client:
+                self.clients[provider] = client
+        self.router = ProviderRouter([p for p in providers if p in self.clients], hedge=hedge)
+        # Shared with transcription, which always gets quota first
+        self.rate_limiter = rate_limiter if rate_limiter is not None else SHARED_RATE_LIMITER
+        self.priority = priority  # PRIORITY_BATCH for recorded calls, which may wait longer for quota
         
         self.system_prompt = """You are an AI sales assistant helping a sales representative during a live call. 
         
@@ -36,55 +308,344 @@ class LLMAssistant:
           🎯 Close - Closing opportunities
         
         Only respond with the suggestion, starting with the appropriate emoji category.
+        If playbook guidance is included, base your suggestion on it.
         If no specific advice is needed, respond with "No suggestions at this time."
         """
+        
+        self.structured_prompt = """You are an AI sales assistant helping a sales representative during a live call.
+        
+        Based on the conversation transcript, give every suggestion that would help right now,
+        at most one per category:
+          tip - General sales advice
+          reminder - Important things not to forget
+          alert - Urgent actions or red flags
+          close - Closing opportunities
+        
+        Respond with JSON only, in this exact shape:
+        {"suggestions": [{"category": "tip", "text": "1-2 sentence suggestion", "priority": 0.8}]}
+        priority is between 0 (nice to have) and 1 (act on it now).
+        If playbook guidance is included, base your suggestions on it.
+        If no specific advice is needed, respond with {"suggestions": []}.
+        """
+    
+    def _chat_client(self):
+        """Client and model of the first available provider, or (None, None) in demo mode"""
+        if not self.router.providers:
+            return None, None
+        provider = self.router.providers[0]
+        return self.clients[provider], CHAT_MODELS[provider]
+    
+    def _quota_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Tokens a request may use: estimated prompt plus the completion limit"""
+        return sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
     
-    def get_suggestions(self, transcript_chunk: str) -> List[str]:
-        """Get AI suggestions based on transcript"""
+    def _complete(self, messages: List[Dict[str, str]], **kwargs):
+        """Chat completion through the router: retried, failed over and optionally hedged.
+
+        Each attempt waits for quota at the assistant's priority and raises
+        QuotaExceeded when it is shed.
+        """
+        tokens = self._quota_tokens(messages, kwargs.get("max_tokens", 0))
+        def operation(provider):
+            return self.rate_limiter.call(
+                provider, self.priority, self.clients[provider].chat.completions.with_raw_response.create,
+                tokens=tokens, model=CHAT_MODELS[provider], messages=messages, **kwargs
+            )
+        return self.router.call(operation)
+    
+    def _open_stream(self, messages: List[Dict[str, str]], **kwargs):
+        """Start a streamed completion through the router.
+
+        An attempt only counts as successful once its first chunk arrived, so
+        a provider that accepts the request but stalls is retried, failed over
+        or hedged like any other slow call. Returns ``(stream, chunks)``.
+        """
+        tokens = self._quota_tokens(messages, kwargs.get("max_tokens", 0))
+        def operation(provider):
+            stream = self.rate_limiter.call(
+                provider, self.priority, self.clients[provider].chat.completions.with_raw_response.create,
+                tokens=tokens, model=CHAT_MODELS[provider], messages=messages, stream=True, **kwargs
+            )
+            chunks = iter(stream)
+            first = next(chunks, None)
+            return stream, itertools.chain([first] if first is not None else [], chunks)
+        return self.router.call(operation, on_discard=lambda result: result[0].close())
+    
+    def provider_stats(self) -> Dict[str, object]:
+        """Retries, failovers, hedges and circuit states of the chat providers"""
+        return self.router.stats()
+    
+    def _build_messages(self, transcript_chunk: str, system_prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        content = f"Recent conversation: {transcript_chunk}"
+        summary = self.conversation_context.summary
+        if summary:
+            content = f"Summary of the call so far: {summary}\n\n{content}"
+        snippets = self._playbook_snippets(transcript_chunk)
+        if snippets:
+            guidance = "\n".join(f"- {snippet}" for snippet in snippets)
+            content = f"Relevant playbook guidance:\n{guidance}\n\n{content}"
+        return [
+            {"role": "system", "content": system_prompt or self.system_prompt},
+            {"role": "user", "content": content}
+        ]
+    
+    def _playbook_snippets(self, transcript_chunk: str) -> List[str]:
+        """Top playbook snippets for the window, trimmed to the token budget, with the lookup time recorded"""
+        start = time.perf_counter()
+        snippets, tokens = [], 0
+        for snippet in self.playbook.lookup(transcript_chunk):
+            snippet_tokens = estimate_tokens(snippet) + 1
+            if snippets and tokens + snippet_tokens > PLAYBOOK_TOKEN_BUDGET:
+                break
+            snippets.append(snippet)
+            tokens += snippet_tokens
+        self.playbook_lookups.append({
+            "seconds": time.perf_counter() - start, "snippets": len(snippets), "tokens": tokens
+        })
+        return snippets
+    
+    def playbook_stats(self) -> Dict[str, float]:
+        """Snippets indexed, plus lookup time and prompt tokens spent on snippets for recent requests"""
+        stats = {"indexed": len(self.playbook)}
+        if not self.playbook_lookups:
+            return dict(stats, snippets=0, tokens=0, avg_tokens=0.0, seconds=0.0, avg_seconds=0.0)
+        last = self.playbook_lookups[-1]
+        count = len(self.playbook_lookups)
+        return dict(
+            stats, snippets=last["snippets"], tokens=last["tokens"], seconds=last["seconds"],
+            avg_tokens=sum(lookup["tokens"] for lookup in self.playbook_lookups) / count,
+            avg_seconds=sum(lookup["seconds"] for lookup in self.playbook_lookups) / count,
+        )
+    
+    def _cache_key(self, model: str, transcript_chunk: str, system_prompt: Optional[str] = None) -> str:
+        if not self.cache:
+            return ""
+        prompt = (system_prompt or self.system_prompt) + self.conversation_context.summary
+        return self.cache.key(model, prompt, transcript_chunk)
+    
+    def _record_prompt_tokens(self, messages: List[Dict[str, str]], usage=None):
+        """Prefer the provider's count; otherwise estimate from the prompt text"""
+        tokens = getattr(usage, "prompt_tokens", None)
+        if tokens is None:
+            tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        self.prompt_tokens.append(tokens)
+    
+    def prompt_token_stats(self) -> Dict[str, float]:
+        """Prompt tokens of the last and recent suggestion requests"""
+        if not self.prompt_tokens:
+            return {"last": 0, "average": 0.0}
+        return {"last": self.prompt_tokens[-1], "average": sum(self.prompt_tokens) / len(self.prompt_tokens)}
+    
+    def summarize(self, previous_summary: str, texts: List[str]) -> Optional[str]:
+        """Fold transcript lines into the running call summary (runs off the hot path)"""
+        client, model = self._chat_client()
+        if not client:
+            return None
+        new_lines = "\n".join(texts)
+        response = self._complete(
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary: {previous_summary or '(none)'}\n\nNew lines:\n{new_lines}"}
+            ],
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=0.2
+        )
+        return response.choices[0].message.content.strip()
+    
+    def _record_latency(self, first_token: Optional[float], total: float):
+        self.latencies.append({"ttft": first_token if first_token is not None else total, "total": total})
+    
+    def latency_stats(self) -> Dict[str, float]:
+        """Time to first token and total latency of recent suggestion requests, in seconds"""
+        if not self.latencies:
+            return {"ttft": 0.0, "total": 0.0, "avg_ttft": 0.0, "avg_total": 0.0}
+        last = self.latencies[-1]
+        return {
+            "ttft": last["ttft"],
+            "total": last["total"],
+            "avg_ttft": sum(entry["ttft"] for entry in self.latencies) / len(self.latencies),
+            "avg_total": sum(entry["total"] for entry in self.latencies) / len(self.latencies),
+        }
+    
+    def _record_cancellation(self, elapsed: float):
+        """Count a superseded request and the latency it would still have cost"""
+        self.cancelled_requests += 1
+        if self.latencies:
+            expected = sum(entry["total"] for entry in self.latencies) / len(self.latencies)
+            self.saved_seconds += max(expected - elapsed, 0.0)
+    
+    def cancellation_stats(self) -> Dict[str, float]:
+        """Requests cancelled because a newer transcript window arrived"""
+        return {"cancelled": self.cancelled_requests, "saved_seconds": self.saved_seconds}
+    
+    def get_suggestions(self, transcript_chunk: str, is_cancelled: Optional[Callable[[], bool]] = None) -> List[str]:
+        """Get AI suggestions based on transcript.
+
+        ``is_cancelled`` is checked before and after the request; a superseded
+        request is skipped or its result discarded. A request shed for quota
+        returns nothing; any other failure is raised for the caller to report.
+        """
         try:
             if not transcript_chunk.strip():
                 return []
-                
-            if self.model_type == "groq" and self.groq_client:
-                response = self.groq_client.chat.completions.create(
-                    model="llama3-8b-8192",  # Groq's fast Llama model
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"Recent conversation: {transcript_chunk}"}
-                    ],
-                    max_tokens=100,
-                    temperature=0.7
-                )
-                
-                suggestion = response.choices[0].message.content.strip()
-                if suggestion and suggestion != "No suggestions at this time.":
-                    return [suggestion]
+            if is_cancelled and is_cancelled():
+                self._record_cancellation(0.0)
                 return []
-            elif self.model_type == "openai" and self.openai_client:
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": self.system_prompt},
-                        {"role": "user", "content": f"Recent conversation: {transcript_chunk}"}
-                    ],
+            
+            client, model = self._chat_client()
+            if client:
+                cache_key = self._cache_key(model, transcript_chunk)
+                cached = self.cache.get(cache_key) if self.cache else None
+                if cached is not None:
+                    return cached
+                
+                messages = self._build_messages(transcript_chunk)
+                start = time.perf_counter()
+                response = self._complete(
+                    messages,
                     max_tokens=100,
                     temperature=0.7
                 )
+                elapsed = time.perf_counter() - start
+                self._record_prompt_tokens(messages, getattr(response, "usage", None))
+                if is_cancelled and is_cancelled():
+                    self.cancelled_requests += 1
+                    return []
+                self._record_latency(None, elapsed)
                 
                 suggestion = response.choices[0].message.content.strip()
-                if suggestion and suggestion != "No suggestions at this time.":
-                    return [suggestion]
-                return []
+                suggestions = [suggestion] if suggestion and suggestion != NO_SUGGESTION else []
+                if self.cache:
+                    self.cache.put(cache_key, suggestions)
+                return suggestions
             else:
-                # Mock suggestions for demo
-                mock_suggestions = [
-                    "💡 Tip: Ask about their current challenges",
-                    "⚠️ Reminder: Mention the ROI benefits",
-                    "❗ Alert: Customer mentioned budget concerns",
-                    "🎯 Close: Good time to ask for next steps"
-                ]
-                return [random.choice(mock_suggestions)]
+                return [random.choice(MOCK_SUGGESTIONS)]
                 
-        except Exception as e:
-            st.error(f"LLM error: {e}")
-            return []
\ No newline at end of file
+        except QuotaExceeded:
+            # Shed so transcription keeps its quota; the next trigger tries again
+            return []
+    
+    def get_structured_suggestions(self, transcript_chunk: str, is_cancelled: Optional[Callable[[], bool]] = None,
+                                   raise_shed: bool = False) -> List[Dict]:
+        """Get suggestions for all categories from one JSON-mode request.
+
+        Returns dicts with ``category``, ``text`` (emoji-prefixed, like the
+        single-suggestion mode) and ``priority``, highest priority first.
+        Failures other than quota shedding are raised, as in get_suggestions;
+        with ``raise_shed`` a shed request raises QuotaExceeded as well.
+        """
+        try:
+            if not transcript_chunk.strip():
+                return []
+            if is_cancelled and is_cancelled():
+                self._record_cancellation(0.0)
+                return []
+            
+            client, model = self._chat_client()
+            if not client:
+                return parse_structured_suggestions("\n".join(MOCK_SUGGESTIONS))
+            
+            cache_key = self._cache_key(model, transcript_chunk, self.structured_prompt)
+            cached = self.cache.get(cache_key) if self.cache else None
+            if cached is not None:
+                return cached
+            
+            messages = self._build_messages(transcript_chunk, self.structured_prompt)
+            start = time.perf_counter()
+            response = self._complete(
+                messages,
+                max_tokens=STRUCTURED_MAX_TOKENS,
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
+            elapsed = time.perf_counter() - start
+            self._record_prompt_tokens(messages, getattr(response, "usage", None))
+            if is_cancelled and is_cancelled():
+                self.cancelled_requests += 1
+                return []
+            self._record_latency(None, elapsed)
+            
+            suggestions = parse_structured_suggestions(response.choices[0].message.content or "")
+            if self.cache:
+                self.cache.put(cache_key, suggestions)
+            return suggestions
+            
+        except QuotaExceeded:
+            if raise_shed:
+                raise
+            return []
+    
+    def stream_suggestions(self, transcript_chunk: str,
+                           is_cancelled: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        """Yield the suggestion text received so far as tokens stream in.
+
+        The last value yielded is the complete suggestion; nothing is yielded
+        when the model replies that it has no advice. ``is_cancelled`` is
+        polled between tokens: once it returns True the HTTP stream is closed
+        and the generator stops without a final value. Failures other than
+        quota shedding are raised, as in get_suggestions.
+        """
+        if not transcript_chunk.strip():
+            return
+        if is_cancelled and is_cancelled():
+            self._record_cancellation(0.0)
+            return
+        
+        client, model = self._chat_client()
+        if not client:
+            yield random.choice(MOCK_SUGGESTIONS)
+            return
+        
+        cache_key = self._cache_key(model, transcript_chunk)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            yield from cached
+            return
+        
+        start = time.perf_counter()
+        first_token = None
+        cancelled = False
+        shed = False
+        text = ""
+        messages = self._build_messages(transcript_chunk)
+        usage = None
+        try:
+            stream, chunks = self._open_stream(
+                messages,
+                max_tokens=100,
+                temperature=0.7
+            )
+            for chunk in chunks:
+                # Usage arrives on the final chunk (Groq reports it under x_groq)
+                usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                if is_cancelled and is_cancelled():
+                    # Stop downloading tokens for a window nobody will see
+                    cancelled = True
+                    stream.close()
+                    self._record_cancellation(time.perf_counter() - start)
+                    return
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                text += delta
+                # Hold back output that may still turn into the "no suggestions" reply
+                if not NO_SUGGESTION.startswith(text.strip()):
+                    yield text.strip()
+            if is_cancelled and is_cancelled():
+                # Superseded right as it finished; the caller discards it
+                self.cancelled_requests += 1
+            if self.cache:
+                text = text.strip()
+                self.cache.put(cache_key, [text] if text and text != NO_SUGGESTION else [])
+        except QuotaExceeded:
+            shed = True
+        finally:
+            # A shed request never reached the provider
+            if not shed:
+                self._record_prompt_tokens(messages, usage)
+            if not (cancelled or shed):
+                self._record_latency(first_token, time.perf_counter() - start)
@@ -0,0 +1,392 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from audio_recorder import merge_wav_chunks, wav_duration, RATE, SAMPLE_WIDTH
+from transcription import ConcurrentTranscriber, MAX_IN_FLIGHT_TRANSCRIPTIONS
+from triggers import SuggestionTrigger
+from alerts import AlertEngine
+
+# Configuration
+AUDIO_QUEUE_SIZE = 8        # Captured chunks waiting for transcription
+WINDOW_QUEUE_SIZE = 1       # Only the freshest transcript window matters for suggestions
+POLL_INTERVAL = 0.1         # Worker wake-up interval while idle
+MAX_CONSECUTIVE_CANCELLATIONS = 3  # Let a request finish after this many were superseded
+UI_IDLE_TIMEOUT = 60        # Stop if the UI has not collected results for this long (tab closed, session expired)
+
+# What to do with new audio when transcription cannot keep up
+OVERFLOW_DROP_OLDEST = "drop_oldest"    # Discard the oldest queued chunk
+OVERFLOW_COALESCE = "coalesce"          # Merge waiting audio into one larger chunk
+OVERFLOW_SKIP_TO_LIVE = "skip_to_live"  # Discard the whole backlog and resume from live audio
+OVERFLOW_POLICIES = [OVERFLOW_COALESCE, OVERFLOW_DROP_OLDEST, OVERFLOW_SKIP_TO_LIVE]
+COALESCE_MAX_SECONDS = 30   # Longest merged chunk; older audio beyond this is dropped
+
+
+class LivePipeline:
+    """Long-lived capture -> transcription -> suggestion pipeline for one session.
+
+    Each stage runs in its own daemon thread and hands work to the next one
+    through a bounded queue, so slow network calls never block the Streamlit
+    script. The UI only drains finished results with ``drain_results()``,
+    and can block in ``wait_for_update()`` until there is something new.
+    If neither is called for ``idle_timeout`` seconds the session is gone,
+    so a watchdog stops the workers and the microphone, closes the journal
+    and sets ``abandoned``.
+    """
+
+    def __init__(self, audio_recorder, transcription_service, llm_assistant,
+                 audio_queue_size=AUDIO_QUEUE_SIZE, trigger=None, alert_engine=None,
+                 max_in_flight=MAX_IN_FLIGHT_TRANSCRIPTIONS, overflow_policy=OVERFLOW_COALESCE,
+                 stream_suggestions=True, structured_suggestions=False, journal=None,
+                 idle_timeout=UI_IDLE_TIMEOUT):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.audio_recorder = audio_recorder
+        self.transcription_service = transcription_service
+        self.llm_assistant = llm_assistant
+        self.trigger = trigger if trigger is not None else SuggestionTrigger()
+        self.alert_engine = alert_engine if alert_engine is not None else AlertEngine()
+        self.max_in_flight = max_in_flight
+        self.overflow_policy = overflow_policy
+        self.stream_suggestions = stream_suggestions
+        self.structured_suggestions = structured_suggestions  # One JSON request for all categories
+        self.partial_suggestion = None  # Suggestion text still streaming in
+        self.journal = journal          # SessionJournal written as results arrive, if any
+        self.transcriber = None
+        self.idle_timeout = idle_timeout
+        self.abandoned = False
+        self._last_contact = time.monotonic()  # Last time the UI collected results
+
+        # Saturation counters, written only by the capture thread
+        self.dropped_chunks = 0
+        self.dropped_seconds = 0.0
+        self.coalesced_chunks = 0
+
+        self.audio_chunks = queue.Queue(maxsize=audio_queue_size)
+        self.transcript_windows = queue.Queue(maxsize=WINDOW_QUEUE_SIZE)
+        self.transcript_results = queue.Queue()
+        self.suggestion_results = queue.Queue()
+        self.errors = queue.Queue()
+
+        self.window_version = 0  # Bumped for every transcript entry
+        self.update_count = 0    # Bumped whenever the UI has something new to show
+        self._updated = threading.Condition()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    @property
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the capture, transcription and suggestion workers"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        chunker = getattr(self.audio_recorder, "chunker", None)
+        if chunker:
+            # One transcript entry per chunk while someone speaks
+            self.trigger.entry_interval = chunker.target_seconds
+        self.abandoned = False
+        self._last_contact = time.monotonic()
+        self.transcriber = ConcurrentTranscriber(
+            self.transcription_service, self._publish_transcript, self.max_in_flight,
+            on_latency=self._record_stt_latency,
+            on_error=lambda e: self._publish(self.errors, f"Transcription error: {e}")
+        )
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._transcription_loop, name="transcription", daemon=True),
+            threading.Thread(target=self._suggestion_loop, name="suggestions", daemon=True),
+            threading.Thread(target=self._watchdog_loop, name="watchdog", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all workers to stop and wait for them to finish"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        if self.transcriber:
+            self.transcriber.shutdown(wait=False)
+
+    def lag_stats(self):
+        """Capture-to-transcript lag of the recent chunks, in seconds"""
+        if not self.transcriber:
+            return {"last": 0.0, "average": 0.0, "max": 0.0}
+        return self.transcriber.lag_stats()
+
+    def overflow_stats(self):
+        """How much audio was dropped or merged because the pipeline was saturated"""
+        ring_buffer = getattr(self.audio_recorder, "ring_buffer", None)
+        overwritten = ring_buffer.overwritten_bytes if ring_buffer else 0
+        return {
+            "policy": self.overflow_policy,
+            "dropped_chunks": self.dropped_chunks,
+            "dropped_seconds": self.dropped_seconds + overwritten / SAMPLE_WIDTH / RATE,
+            "coalesced_chunks": self.coalesced_chunks,
+            "queued_chunks": self.audio_chunks.qsize(),
+        }
+
+    def wait_for_update(self, seen, timeout):
+        """Block until ``update_count`` moves past ``seen`` or the timeout passes; return it"""
+        self._last_contact = time.monotonic()
+        with self._updated:
+            self._updated.wait_for(lambda: self.update_count != seen, timeout=timeout)
+            return self.update_count
+
+    def drain_results(self):
+        """Return transcript entries, suggestions and errors produced since the last call"""
+        self._last_contact = time.monotonic()
+        return (
+            self._drain(self.transcript_results),
+            self._drain(self.suggestion_results),
+            self._drain(self.errors),
+        )
+
+    def _watchdog_loop(self):
+        """Shut the session down once the UI stops collecting results"""
+        while not self._stop_event.wait(POLL_INTERVAL * 10):
+            idle = time.monotonic() - self._last_contact
+            if idle < self.idle_timeout:
+                continue
+            self.abandoned = True
+            self._stop_event.set()
+            if self.transcriber:
+                self.transcriber.shutdown(wait=False)
+            try:
+                self.audio_recorder.stop_recording()
+            except Exception:
+                pass
+            if self.journal:
+                self.journal.close()
+            self._publish(self.errors, f"Session stopped: the page was not open for {idle:.0f}s")
+
+    def _capture_loop(self):
+        """Pull audio chunks from the recorder and hand them to transcription"""
+        pending = None  # (audio_data, captured_at) waiting for room in the queue
+        while not self._stop_event.is_set():
+            try:
+                audio_data = self.audio_recorder.get_audio_chunk()
+            except Exception as e:
+                self._publish(self.errors, f"Audio capture error: {e}")
+                break
+
+            if audio_data:
+                captured_at = time.time()
+                if pending:
+                    pending = self._coalesce(pending, (audio_data, captured_at))
+                else:
+                    pending = (audio_data, captured_at)
+            elif not pending:
+                self._stop_event.wait(POLL_INTERVAL)
+                continue
+
+            try:
+                if self.overflow_policy == OVERFLOW_COALESCE:
+                    # Waiting briefly lets more audio accumulate rather than spinning
+                    self.audio_chunks.put(pending, timeout=POLL_INTERVAL)
+                else:
+                    self.audio_chunks.put_nowait(pending)
+                pending = None
+            except queue.Full:
+                pending = self._handle_overflow(pending)
+
+    def _handle_overflow(self, chunk):
+        """Apply the overflow policy to a chunk that found the queue full.
+
+        Returns the chunk if it should keep waiting (coalesce), otherwise None.
+        """
+        if self.overflow_policy == OVERFLOW_COALESCE:
+            # Keep it; later audio is merged into it until there is room
+            return chunk
+
+        if self.overflow_policy == OVERFLOW_SKIP_TO_LIVE:
+            for audio_data, _ in self._drain(self.audio_chunks):
+                self._count_dropped(audio_data)
+            ring_buffer = getattr(self.audio_recorder, "ring_buffer", None)
+            if ring_buffer:
+                self.dropped_seconds += ring_buffer.clear() / SAMPLE_WIDTH / RATE
+        else:
+            try:
+                audio_data, _ = self.audio_chunks.get_nowait()
+                self._count_dropped(audio_data)
+            except queue.Empty:
+                pass
+
+        try:
+            self.audio_chunks.put_nowait(chunk)
+        except queue.Full:
+            self._count_dropped(chunk[0])
+        return None
+
+    def _coalesce(self, pending, chunk):
+        """Merge a new chunk into audio still waiting for the transcription queue"""
+        merged, trimmed_seconds = merge_wav_chunks(pending[0], chunk[0], COALESCE_MAX_SECONDS)
+        if merged is None:
+            # Formats differ (e.g. browser recordings); keep only the newest audio
+            self._count_dropped(pending[0])
+            return chunk
+        self.coalesced_chunks += 1
+        if trimmed_seconds:
+            self.dropped_seconds += trimmed_seconds
+        return merged, chunk[1]
+
+    def _count_dropped(self, audio_data):
+        self.dropped_chunks += 1
+        self.dropped_seconds += wav_duration(audio_data)
+
+    def _transcription_loop(self):
+        """Submit queued audio chunks to the concurrent transcriber"""
+        while not self._stop_event.is_set():
+            try:
+                audio_data, captured_at = self.audio_chunks.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            # Wait for a free in-flight slot without ignoring stop requests
+            while not self._stop_event.is_set():
+                if self.transcriber.submit(audio_data, captured_at, timeout=POLL_INTERVAL):
+                    break
+
+    def _record_stt_latency(self, seconds):
+        """Let the recorder's chunker adapt its chunk length to the backend speed"""
+        chunker = getattr(self.audio_recorder, "chunker", None)
+        if chunker:
+            chunker.record_latency(seconds)
+
+    def _publish_transcript(self, sequence, transcript_text, captured_at):
+        """Called by the transcriber for each chunk, in capture order"""
+        if transcript_text and transcript_text.strip():
+            transcript_entry = {
+                "time_ms": int(captured_at * 1000),  # Formatted when displayed
+                "text": transcript_text
+            }
+            self._publish(self.transcript_results, transcript_entry)
+            self._write_journal("add_transcript", transcript_entry["time_ms"], transcript_text)
+
+            # Local alerts go out right away, without waiting for the LLM
+            for alert in self.alert_engine.scan(transcript_text):
+                self._publish_suggestion({
+                    "timestamp": datetime.now().strftime("%H:%M:%S"),
+                    "text": alert,
+                    "source": "alert"
+                })
+            # The assistant keeps a rolling summary plus the recent tail within its token budget
+            context = self.llm_assistant.conversation_context
+            context.add(transcript_text)
+            _, recent_transcript = context.window()
+            self.window_version += 1
+            self._put_latest(self.transcript_windows, (self.window_version, recent_transcript))
+            self.trigger.on_transcript(transcript_text)
+
+    def _suggestion_loop(self):
+        """Request suggestions for the freshest transcript window when the trigger fires.
+
+        The trigger fires on new content at the end of a speaker turn, on
+        trigger phrases, or after a maximum interval (see SuggestionTrigger).
+        Each request is tagged with the window version it was built from. When
+        a newer window arrives while it is in flight, the request is cancelled
+        (streaming) or its result discarded, unless the last few requests were
+        all superseded, so a fast-talking call still gets suggestions.
+        """
+        consecutive_cancellations = 0
+        while not self._stop_event.is_set():
+            if not self.trigger.poll():
+                self._stop_event.wait(POLL_INTERVAL)
+                continue
+
+            try:
+                version, recent_transcript = self.transcript_windows.get_nowait()
+            except queue.Empty:
+                continue
+
+            allow_cancel = consecutive_cancellations < MAX_CONSECUTIVE_CANCELLATIONS
+            is_cancelled = lambda: allow_cancel and self.window_version > version
+            try:
+                if self.structured_suggestions:
+                    suggestions = self.llm_assistant.get_structured_suggestions(recent_transcript, is_cancelled)
+                elif self.stream_suggestions:
+                    suggestions = self._stream_suggestion(recent_transcript, is_cancelled)
+                else:
+                    suggestions = self.llm_assistant.get_suggestions(recent_transcript, is_cancelled)
+            except Exception as e:
+                self._publish(self.errors, f"LLM error: {e}")
+                continue
+            finally:
+                self._set_partial(None)
+
+            if is_cancelled():
+                consecutive_cancellations += 1
+                continue
+            consecutive_cancellations = 0
+
+            for suggestion in suggestions:
+                # Structured mode returns dicts with category and priority
+                details = suggestion if isinstance(suggestion, dict) else {"text": suggestion}
+                if self.alert_engine.is_duplicate(details["text"]):
+                    continue
+                self._publish_suggestion({
+                    "timestamp": datetime.now().strftime("%H:%M:%S"),
+                    **details,
+                    "source": "llm"
+                })
+
+    def _stream_suggestion(self, recent_transcript, is_cancelled):
+        """Expose partial suggestion text while it streams; returns the final suggestion"""
+        text = None
+        for text in self.llm_assistant.stream_suggestions(recent_transcript, is_cancelled):
+            self._set_partial(text)
+        return [text] if text else []
+
+    def _set_partial(self, text):
+        if text != self.partial_suggestion:
+            self.partial_suggestion = text
+            self._notify()
+
+    def _publish(self, target_queue, item):
+        """Queue a result for the UI and wake anyone waiting in wait_for_update()"""
+        target_queue.put(item)
+        self._notify()
+
+    def _publish_suggestion(self, suggestion):
+        self._publish(self.suggestion_results, suggestion)
+        self._write_journal("add_suggestion", suggestion)
+
+    def _write_journal(self, method, *args):
+        """Persist a result right away, so it survives even if the UI never drains it"""
+        if not self.journal:
+            return
+        try:
+            getattr(self.journal, method)(*args)
+        except OSError as e:
+            self._publish(self.errors, f"Session journal error: {e}")
+
+    def _notify(self):
+        with self._updated:
+            self.update_count += 1
+            self._updated.notify_all()
+
+    @staticmethod
+    def _put_latest(target_queue, item):
+        """Put item on a bounded queue, discarding the oldest entry when it is full"""
+        while True:
+            try:
+                target_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    target_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    @staticmethod
+    def _drain(source_queue):
+        items = []
+        while True:
+            try:
+                items.append(source_queue.get_nowait())
+            except queue.Empty:
+                return items
@@ -0,0 +1,107 @@
+import glob
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+import streamlit as st
+
+from search_index import BM25_B, BM25_K1, tokenize
+
+# Configuration
+PLAYBOOK_DIR = os.getenv("PLAYBOOK_DIR", "playbook")  # Objection-handling notes used to ground suggestions
+PLAYBOOK_PATTERNS = ["*.md", "*.txt"]
+SNIPPET_MAX_CHARS = 600     # Paragraphs under one heading are merged up to this size
+PLAYBOOK_TOP_K = 3
+PLAYBOOK_TOKEN_BUDGET = 250  # Prompt tokens spent on playbook snippets at most
+PLAYBOOK_MIN_SCORE = 1.0     # Weaker matches are left out of the prompt
+
+# Filler words that say nothing about the topic of a transcript window
+STOPWORDS = frozenset("""
+a about all also am an and any are as at be because been but by can could did do does don't for from
+get got had has have he her him his how i i'm if in into is it it's just know like me my no not now of
+okay on one or our out really right see she so some that that's the their them then there they this to
+um uh up us was we we're well were what when where which who will with would yeah yes you you're your
+""".split())
+
+HEADING_PATTERN = re.compile(r"^#+\s*")
+
+
+def split_snippets(text: str) -> List[Tuple[str, str]]:
+    """``(heading, snippet)`` pairs: blank-line separated paragraphs grouped under their Markdown heading"""
+    snippets = []
+    heading, current = "", []
+    def flush():
+        if current:
+            snippets.append((heading, " ".join(current)))
+            current.clear()
+    for paragraph in re.split(r"\n\s*\n", text):
+        lines = [line.strip() for line in paragraph.strip().splitlines() if line.strip()]
+        if lines and HEADING_PATTERN.match(lines[0]):
+            flush()
+            heading = HEADING_PATTERN.sub("", lines.pop(0))
+        if not lines:
+            continue
+        paragraph_text = " ".join(lines)
+        if current and sum(len(part) + 1 for part in current) + len(paragraph_text) > SNIPPET_MAX_CHARS:
+            flush()
+        current.append(paragraph_text)
+    flush()
+    return snippets
+
+
+class PlaybookIndex:
+    """BM25 index over playbook snippets, built once and then only read.
+
+    Scores per term and snippet are precomputed at build time, so a lookup
+    is a few dictionary reads per distinct query word plus a top-k
+    selection, cheap enough to run on every suggestion request.
+    """
+
+    def __init__(self, snippets: List[Tuple[str, str]]):
+        self.snippets = [f"{heading}: {text}" if heading else text for heading, text in snippets]
+        term_counts = [Counter(tokenize(f"{heading} {text}")) for heading, text in snippets]
+        lengths = [sum(counts.values()) for counts in term_counts]
+        average_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for snippet_id, counts in enumerate(term_counts):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[snippet_id] / average_length)
+            for term, frequency in counts.items():
+                idf = math.log(1 + (len(snippets) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                self.postings[term].append((snippet_id, idf * frequency * (BM25_K1 + 1) / (frequency + norm)))
+
+    @classmethod
+    def from_directory(cls, directory: str = PLAYBOOK_DIR) -> "PlaybookIndex":
+        snippets = []
+        for pattern in PLAYBOOK_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(directory, "**", pattern), recursive=True)):
+                try:
+                    with open(path, encoding="utf-8") as playbook_file:
+                        snippets.extend(split_snippets(playbook_file.read()))
+                except (OSError, UnicodeDecodeError):
+                    continue
+        return cls(snippets)
+
+    def __len__(self):
+        return len(self.snippets)
+
+    def lookup(self, text: str, top_k: int = PLAYBOOK_TOP_K, min_score: float = PLAYBOOK_MIN_SCORE) -> List[str]:
+        """The best matching snippets for a transcript window, best first"""
+        if not self.snippets:
+            return []
+        scores = defaultdict(float)
+        for term in set(tokenize(text)) - STOPWORDS:
+            for snippet_id, score in self.postings.get(term, ()):
+                scores[snippet_id] += score
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [self.snippets[snippet_id] for snippet_id, score in best if score >= min_score]
+
+
+@st.cache_resource(show_spinner=False)
+def get_playbook_index() -> PlaybookIndex:
+    """Process-wide playbook index, built on first use at startup"""
+    return PlaybookIndex.from_directory(PLAYBOOK_DIR)
@@ -0,0 +1,371 @@
+import streamlit as st
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from ratelimit import QuotaExceeded
+
+# Configuration
+MAX_RETRIES = 2             # Retries per provider before failing over
+BACKOFF_BASE = 0.25         # Seconds before the first retry; doubles each time
+BACKOFF_MAX = 2.0
+FAILURE_THRESHOLD = 3       # Consecutive failures that open a provider's circuit
+RESET_TIMEOUT = 30          # Seconds an open circuit waits before letting a probe through
+HEDGE_PERCENTILE = 0.95     # Hedge once the primary is slower than this latency percentile
+HEDGE_MIN_SAMPLES = 10      # Latency samples needed before the percentile is trusted
+HEDGE_DEFAULT_DELAY = 2.0   # Hedge delay until enough samples exist
+LATENCY_WINDOW = 100
+REQUEST_TIMEOUT = 30.0      # Seconds per HTTP request; the SDK defaults are far longer
+POOL_MAX_CONNECTIONS = 32   # Per provider, shared by every session in the process
+POOL_MAX_KEEPALIVE = 16
+KEEPALIVE_EXPIRY = 60.0     # Keep idle connections open between chunks (httpx defaults to 5 s)
+RETRYABLE_STATUS = {408, 409, 429}  # Client errors worth retrying; every 5xx is retried as well
+
+PROVIDERS = ["groq", "openai"]
+API_KEY_VARS = {"groq": "GROQ_API_KEY", "openai": "OPENAI_API_KEY"}
+
+
+def provider_order(preferred: str) -> List[str]:
+    """The preferred provider first, then the others as fallbacks"""
+    return [preferred] + [name for name in PROVIDERS if name != preferred]
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error may go away on retry or on another provider.
+
+    Connection errors, timeouts, 408/409/429 and 5xx responses are; other
+    client errors (bad audio, unsupported parameters, 401, 413) would fail
+    the same way everywhere.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    return isinstance(error, _connection_errors())
+
+
+@lru_cache(maxsize=None)
+def _connection_errors() -> tuple:
+    errors = [ConnectionError, TimeoutError]
+    for module_name, name in (("httpx", "TransportError"), ("groq", "APIConnectionError"),
+                              ("openai", "APIConnectionError")):
+        try:
+            errors.append(getattr(__import__(module_name), name))
+        except ImportError:
+            pass
+    return tuple(errors)
+
+
+def create_client(provider: str, http_client=None):
+    """SDK client for a provider, or None when its API key is not set.
+
+    The SDK's own retries are disabled so ProviderRouter decides when to
+    retry and when to fail over.
+    """
+    api_key = os.getenv(API_KEY_VARS[provider])
+    if not api_key:
+        return None
+    # SDKs are imported on first use; they dominate the app's import time
+    if provider == "groq":
+        from groq import Groq
+        return Groq(api_key=api_key, max_retries=0, timeout=REQUEST_TIMEOUT, http_client=http_client)
+    import openai
+    return openai.OpenAI(api_key=api_key, max_retries=0, timeout=REQUEST_TIMEOUT, http_client=http_client)
+
+
+class ClientPool:
+    """One SDK client per provider and API key, shared by every session in the process.
+
+    Each client sits on a keep-alive httpx connection pool, so sessions reuse
+    open TLS connections instead of handshaking for their first request.
+    ``warm()`` opens connections ahead of time, and ``stats()`` reports how
+    many API requests went out on a new versus a reused connection (warm-up
+    requests are not counted).
+    """
+
+    def __init__(self):
+        self._clients = {}  # (provider, api key) -> (SDK client, httpx client)
+        self._lock = threading.Lock()
+        self.counters = {name: {"requests": 0, "new_connections": 0} for name in PROVIDERS}
+
+    def get(self, provider: str):
+        """Shared client for a provider, or None when its API key is not set"""
+        client, _ = self._entry(provider)
+        return client
+
+    def warm(self, providers: Optional[List[str]] = None):
+        """Open a connection to each provider in the background (TLS handshake only, no API call)"""
+        for provider in providers or PROVIDERS:
+            client, http_client = self._entry(provider)
+            if client:
+                threading.Thread(target=self._warm, args=(http_client, str(client.base_url)),
+                                 name=f"warm-{provider}", daemon=True).start()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests and newly opened connections per provider"""
+        with self._lock:
+            return {
+                name: dict(counts, reused=counts["requests"] - counts["new_connections"])
+                for name, counts in self.counters.items()
+            }
+
+    def _entry(self, provider: str):
+        key = (provider, os.getenv(API_KEY_VARS[provider]))
+        if not key[1]:
+            return None, None
+        with self._lock:
+            if key not in self._clients:
+                import httpx
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                        keepalive_expiry=KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=REQUEST_TIMEOUT,
+                    event_hooks={"request": [lambda request: self._trace(provider, request)]},
+                )
+                self._clients[key] = (create_client(provider, http_client), http_client)
+            return self._clients[key]
+
+    @staticmethod
+    def _warm(http_client, base_url: str):
+        try:
+            # Any response will do; the point is a pooled, already-negotiated connection
+            http_client.head(base_url, extensions={"warmup": True})
+        except Exception:
+            pass
+
+    def _trace(self, provider: str, request):
+        """Count each request, and each one that had to open a new connection"""
+        if request.extensions.get("warmup"):
+            # Its connection is opened here, so the first API request on it counts as reused
+            return
+        with self._lock:
+            self.counters[provider]["requests"] += 1
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                with self._lock:
+                    self.counters[provider]["new_connections"] += 1
+
+        request.extensions["trace"] = trace
+
+
+@st.cache_resource
+def get_client_pool() -> ClientPool:
+    """The process-wide client pool (created once, shared across sessions and reruns)"""
+    return ClientPool()
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures, probing again after a timeout.
+
+    closed -> open after ``failure_threshold`` consecutive failures;
+    open -> half-open once ``reset_timeout`` has passed, letting one request
+    through; its success closes the circuit and its failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot after an attempt that said nothing about the provider's health"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderRouter:
+    """Runs an operation against an ordered list of providers.
+
+    ``operation(provider)`` performs the request with that provider's client
+    and raises on failure. Each provider is retried with exponential backoff,
+    skipped while its circuit breaker is open, and the next provider is used
+    when it gives up or has no quota left (``QuotaExceeded``). Errors that are
+    not ``is_transient`` (a bad request) are raised at once and leave the
+    breaker alone. With ``hedge=True`` a second request goes to the backup
+    provider once the primary is slower than its recent p95 latency, and the
+    first successful answer wins; ``on_discard`` receives the loser's result
+    (e.g. to close a stream).
+    """
+
+    def __init__(self, providers: List[str], hedge=False, max_retries=MAX_RETRIES):
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.max_retries = max_retries
+        self.breakers = {name: CircuitBreaker() for name in self.providers}
+        self.latencies = {name: deque(maxlen=LATENCY_WINDOW) for name in self.providers}
+        self.counters = {"requests": 0, "retries": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+
+    def call(self, operation: Callable[[str], object], on_discard: Optional[Callable[[object], None]] = None):
+        """Return the first successful result, raising the last error if every provider fails"""
+        self._count("requests")
+        providers = self.providers
+        last_error = None
+
+        if self.hedge and len(providers) > 1 and self.breakers[providers[0]].allow():
+            try:
+                return self._hedged(operation, providers[0], providers[1], on_discard)
+            except QuotaExceeded as e:
+                last_error = e
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                last_error = e
+
+        for index, name in enumerate(providers):
+            if index > 0:
+                self._count("failovers")
+            for attempt in range(self.max_retries + 1):
+                if not self.breakers[name].allow():
+                    break
+                try:
+                    return self._attempt(name, operation)
+                except QuotaExceeded as e:
+                    # Out of quota is not a fault; move straight to the next provider
+                    last_error = e
+                    break
+                except Exception as e:
+                    if not is_transient(e):
+                        raise
+                    last_error = e
+                    if attempt < self.max_retries:
+                        self._count("retries")
+                        time.sleep(self._backoff(attempt))
+
+        if last_error is None:
+            raise RuntimeError("No provider available (all circuits open)")
+        raise last_error
+
+    def hedge_delay(self, name: str) -> float:
+        """Recent p95 latency of a provider, or the default until there are enough samples"""
+        with self._lock:
+            samples = sorted(self.latencies[name])
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return samples[min(int(len(samples) * HEDGE_PERCENTILE), len(samples) - 1)]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["circuits"] = {name: breaker.state for name, breaker in self.breakers.items()}
+        return counters
+
+    def _attempt(self, name: str, operation):
+        """One request against one provider, feeding its breaker and latency window"""
+        start = time.perf_counter()
+        try:
+            result = operation(name)
+        except QuotaExceeded:
+            # Shed before reaching the provider: neither a success nor a failure
+            self.breakers[name].release_probe()
+            raise
+        except Exception as e:
+            if is_transient(e):
+                self.breakers[name].record_failure()
+            else:
+                # The request was at fault, not the provider
+                self.breakers[name].release_probe()
+            raise
+        self.breakers[name].record_success()
+        with self._lock:
+            self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+    def _hedged(self, operation, primary: str, backup: str, on_discard):
+        """Start the primary; if it is slower than its p95, race it against the backup
+
+        Each call gets its own two threads: a shared pool would make concurrent
+        callers (chunk workers, batch sections) queue behind each other's hedges.
+        """
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+        try:
+            return self._race(executor, operation, primary, backup, on_discard)
+        finally:
+            # The loser keeps running; its thread exits when it finishes
+            executor.shutdown(wait=False)
+
+    def _race(self, executor, operation, primary: str, backup: str, on_discard):
+        futures = {executor.submit(self._attempt, primary, operation): primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        if not done and self.breakers[backup].allow():
+            self._count("hedges")
+            futures[executor.submit(self._attempt, backup, operation)] = backup
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    if is_transient(last_error) or isinstance(last_error, QuotaExceeded):
+                        continue
+                    for loser in pending:
+                        loser.add_done_callback(lambda f: self._discard(f, on_discard))
+                    raise last_error
+                if futures[future] == backup:
+                    self._count("hedge_wins")
+                for loser in pending:
+                    loser.add_done_callback(lambda f: self._discard(f, on_discard))
+                return future.result()
+        raise last_error
+
+    @staticmethod
+    def _discard(future, on_discard):
+        if on_discard and future.exception() is None:
+            try:
+                on_discard(future.result())
+            except Exception:
+                pass
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
@@ -0,0 +1,223 @@
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+# Configuration
+# Quotas assumed until the provider reports its own in response headers
+DEFAULT_LIMITS = {
+    "groq": {"requests": 30, "requests_day": 14400, "tokens": 6000},
+    "openai": {"requests": 500, "tokens": 200000},
+}
+# Seconds over which each kind of bucket refills to its limit
+BUCKET_WINDOWS = {"requests": 60.0, "requests_day": 86400.0, "tokens": 60.0}
+# Bucket fed by each provider's x-ratelimit-{limit,remaining,reset}-<header> headers. Groq reports
+# requests per day (tokens per minute), so its per-minute request bucket is never enlarged by them.
+HEADER_BUCKETS = {
+    "groq": {"requests": "requests_day", "tokens": "tokens"},
+    "openai": {"requests": "requests", "tokens": "tokens"},
+}
+SUGGESTION_RESERVE = 0.2        # Share of each quota only transcription may use
+SUGGESTION_MAX_WAIT = 2.0       # Seconds a suggestion call may be deferred before it is shed
+TRANSCRIPTION_MAX_WAIT = 30.0   # Seconds a transcription call waits before failing over
+BATCH_MAX_WAIT = 600.0          # Seconds a request for an uploaded recording waits; nobody is live on it
+
+PRIORITY_TRANSCRIPTION = 0
+PRIORITY_SUGGESTION = 1
+PRIORITY_BATCH = 2
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class QuotaExceeded(Exception):
+    """A request was shed because its provider's quota has no headroom left"""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from a rate-limit reset header such as ``"1m30.5s"``, ``"6ms"`` or ``"2"``"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Holds up to ``capacity`` units and refills at ``rate`` units per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available (0 if they already are)"""
+        missing = amount - self.level
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+    def sync(self, limit: float, remaining: float, reset_seconds: Optional[float], now: float):
+        """Adopt the quota reported by the provider: refill to ``limit`` by the reset time"""
+        self.capacity = max(float(limit), 1.0)
+        self.level = min(float(remaining), self.capacity)
+        if reset_seconds:
+            self.rate = max(self.capacity - self.level, 1.0) / reset_seconds
+        self.updated = now
+
+
+class RateLimiter:
+    """Shared request/token buckets per provider, with transcription served first.
+
+    Transcription and suggestion calls draw on the same per-provider buckets.
+    Transcription may use the whole quota and blocks suggestions while it is
+    waiting; suggestions must leave ``reserve`` of each bucket untouched, are
+    deferred up to ``suggestion_max_wait`` seconds and are then shed with
+    ``QuotaExceeded``. Batch requests (recorded calls) follow the same
+    rules as suggestions but wait up to ``batch_max_wait``, so they are
+    throttled to the quota rather than shed. Buckets start from ``DEFAULT_LIMITS`` and follow the
+    provider's ``x-ratelimit-*`` (and ``retry-after``) headers once seen,
+    each header feeding the bucket of its own window (``HEADER_BUCKETS``).
+    """
+
+    def __init__(self, limits=None, reserve=SUGGESTION_RESERVE,
+                 suggestion_max_wait=SUGGESTION_MAX_WAIT, transcription_max_wait=TRANSCRIPTION_MAX_WAIT,
+                 batch_max_wait=BATCH_MAX_WAIT):
+        limits = limits if limits is not None else DEFAULT_LIMITS
+        self.reserve = reserve
+        self.max_wait = {
+            PRIORITY_TRANSCRIPTION: transcription_max_wait,
+            PRIORITY_SUGGESTION: suggestion_max_wait,
+            PRIORITY_BATCH: batch_max_wait,
+        }
+        self.buckets = {
+            provider: {kind: TokenBucket(limit, limit / BUCKET_WINDOWS[kind]) for kind, limit in quota.items()}
+            for provider, quota in limits.items()
+        }
+        self.counters = {"granted": 0, "deferred": 0, "shed": 0}
+        self._waiting_transcriptions = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, provider: str, priority: int, tokens: int = 0):
+        """Take one request (and ``tokens`` tokens) from the provider's quota.
+
+        Blocks while there is no headroom; raises QuotaExceeded once the
+        priority's maximum wait has passed.
+        """
+        buckets = self.buckets.get(provider)
+        if not buckets:
+            return
+        deadline = time.monotonic() + self.max_wait[priority]
+        deferred = False
+        with self._condition:
+            if priority == PRIORITY_TRANSCRIPTION:
+                self._waiting_transcriptions += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(buckets, priority, tokens, now)
+                    if wait == 0:
+                        for kind, bucket in buckets.items():
+                            bucket.level -= self._amount(kind, bucket, tokens)
+                        self.counters["granted"] += 1
+                        return
+                    if now + wait > deadline:
+                        # It will not fit in time; waiting any longer would only add latency
+                        self.counters["shed"] += 1
+                        raise QuotaExceeded(f"{provider} quota exhausted")
+                    if not deferred:
+                        deferred = True
+                        self.counters["deferred"] += 1
+                    self._condition.wait(min(wait, deadline - now))
+            finally:
+                if priority == PRIORITY_TRANSCRIPTION:
+                    self._waiting_transcriptions -= 1
+                    self._condition.notify_all()
+
+    def call(self, provider: str, priority: int, create_raw, tokens: int = 0, **kwargs):
+        """Acquire quota, then run an SDK ``with_raw_response.create`` and learn from its headers"""
+        self.acquire(provider, priority, tokens)
+        try:
+            raw_response = create_raw(**kwargs)
+        except Exception as e:
+            # Error responses (429 in particular) carry the quota headers too
+            self.update_from_headers(provider, getattr(getattr(e, "response", None), "headers", None))
+            raise
+        self.update_from_headers(provider, raw_response.headers)
+        return raw_response.parse()
+
+    def update_from_headers(self, provider: str, headers):
+        """Sync the buckets with the quota reported in a response's headers"""
+        buckets = self.buckets.get(provider)
+        if not buckets or headers is None:
+            return
+        now = time.monotonic()
+        with self._condition:
+            for header, kind in HEADER_BUCKETS.get(provider, {}).items():
+                bucket = buckets.get(kind)
+                limit = headers.get(f"x-ratelimit-limit-{header}")
+                remaining = headers.get(f"x-ratelimit-remaining-{header}")
+                if bucket is None or limit is None or remaining is None:
+                    continue
+                try:
+                    bucket.sync(float(limit), float(remaining),
+                                parse_duration(headers.get(f"x-ratelimit-reset-{header}")), now)
+                except ValueError:
+                    continue
+            retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after:
+                # Rejected with 429: nothing is available until the provider says so
+                bucket = buckets["requests"]
+                bucket.refill(now)
+                bucket.level = min(bucket.level, 1 - bucket.rate * retry_after)
+            self._condition.notify_all()
+
+    def headroom(self) -> Dict[str, Dict[str, float]]:
+        """Share of each provider's request and token quota currently available"""
+        now = time.monotonic()
+        with self._condition:
+            result = {}
+            for provider, buckets in self.buckets.items():
+                result[provider] = {}
+                for kind, bucket in buckets.items():
+                    bucket.refill(now)
+                    result[provider][kind] = max(bucket.level, 0.0) / bucket.capacity
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return dict(self.counters)
+
+    def _wait_time(self, buckets, priority: int, tokens: int, now: float) -> float:
+        """Seconds until this request fits (0 if it does now); call with the lock held"""
+        if priority != PRIORITY_TRANSCRIPTION and self._waiting_transcriptions:
+            # Suggestions never overtake queued transcription
+            return 0.1
+        wait = 0.0
+        for kind, bucket in buckets.items():
+            bucket.refill(now)
+            amount = self._amount(kind, bucket, tokens)
+            if priority != PRIORITY_TRANSCRIPTION:
+                amount = min(amount + self.reserve * bucket.capacity, bucket.capacity)
+            wait = max(wait, bucket.time_until(amount))
+        return wait
+
+    @staticmethod
+    def _amount(kind: str, bucket: TokenBucket, tokens: int) -> float:
+        """Units one request takes from a bucket"""
+        return min(tokens, bucket.capacity) if kind == "tokens" else 1
+
+
+# One scheduler for the whole process, shared by transcription and suggestions
+SHARED_RATE_LIMITER = RateLimiter()
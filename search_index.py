@@ -0,0 +1,303 @@
+"""Inverted index and search over exported sales sessions.
+
+Usage:
+    python search_index.py index [DIR ...] [--index session_index.pkl]
+    python search_index.py search QUERY [--limit 10] [--by-session] [--index session_index.pkl]
+
+Indexes every transcript entry of the ``sales_session_*.json`` exports and
+``sales_session_*.tpz`` archives in the given directories. Re-running
+``index`` only reads files that are new or changed since the last run.
+
+Queries combine plain terms, quoted phrases and prefixes; every part must
+match and hits are ranked with BM25::
+
+    python search_index.py search 'competitor'
+    python search_index.py search '"free trial" pric*' --by-session
+"""
+import argparse
+import bisect
+import glob
+import json
+import math
+import os
+import pickle
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from archive import ArchiveReader, ARCHIVE_EXTENSION, SECTION_TRANSCRIPT
+
+# Configuration
+INDEX_PATH = "session_index.pkl"
+SESSION_PATTERNS = ["sales_session_*.json", f"sales_session_*{ARCHIVE_EXTENSION}"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+COMPACT_THRESHOLD = 0.25   # Rebuild postings once this share of indexed entries is stale
+
+TOKEN_PATTERN = re.compile(r"[\w']+")
+QUERY_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def load_session_entries(path: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """``(start_time, [(timestamp, text), ...])`` from a JSON export or a .tpz archive"""
+    if path.endswith(ARCHIVE_EXTENSION):
+        reader = ArchiveReader(path)
+        session_data = reader.to_session_data([SECTION_TRANSCRIPT])
+        entries, session_info = session_data["transcript"], session_data["session_info"]
+    else:
+        with open(path, encoding="utf-8") as session_file:
+            session_data = json.load(session_file)
+        entries = session_data.get("transcript", [])
+        session_info = session_data.get("session_info", {})
+    return session_info.get("start_time"), [(entry.get("timestamp", ""), entry.get("text", "")) for entry in entries]
+
+
+class SessionIndex:
+    """Incremental inverted index of transcript entries across sessions.
+
+    Each transcript entry is a document. Postings map a term to
+    ``{doc_id: [positions]}``, so phrase queries can check adjacency. Files
+    are tracked by modification time and size: ``update()`` indexes only
+    new or changed files, and entries of changed or deleted files are
+    tombstoned until enough of them pile up to compact the postings.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict] = {}         # path -> {"mtime", "size", "start_time", "docs"}
+        self.docs: List[Optional[Tuple]] = []        # doc_id -> (path, timestamp, text, length) or None
+        self.postings: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        self.total_length = 0
+        self.live_docs = 0
+        self._sorted_terms: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "SessionIndex":
+        if not os.path.exists(path):
+            return cls()
+        index = cls()
+        with open(path, "rb") as index_file:
+            state = pickle.load(index_file)
+        index.sessions, index.docs = state["sessions"], state["docs"]
+        index.postings = defaultdict(dict, state["postings"])
+        index.total_length, index.live_docs = state["total_length"], state["live_docs"]
+        return index
+
+    def save(self, path: str = INDEX_PATH):
+        """Write the index atomically (plain containers only, so any caller can load it)"""
+        state = {
+            "sessions": self.sessions, "docs": self.docs, "postings": dict(self.postings),
+            "total_length": self.total_length, "live_docs": self.live_docs,
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as index_file:
+            pickle.dump(state, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def update(self, directories: List[str]) -> Dict[str, int]:
+        """Index new and changed session files; forget deleted ones"""
+        found = {}
+        for directory in directories:
+            for pattern in SESSION_PATTERNS:
+                for path in glob.glob(os.path.join(directory, pattern)):
+                    stat = os.stat(path)
+                    found[os.path.abspath(path)] = (stat.st_mtime, stat.st_size)
+
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0}
+        for path in [path for path in self.sessions if path not in found]:
+            self._remove(path)
+            counts["removed"] += 1
+        for path, (mtime, size) in sorted(found.items()):
+            known = self.sessions.get(path)
+            if known and (known["mtime"], known["size"]) == (mtime, size):
+                counts["unchanged"] += 1
+                continue
+            try:
+                start_time, entries = load_session_entries(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping {path}: {e}", file=sys.stderr)
+                counts["failed"] += 1
+                continue
+            if known:
+                self._remove(path)
+            self._add(path, mtime, size, start_time, entries)
+            counts["updated" if known else "added"] += 1
+
+        if len(self.docs) and 1 - self.live_docs / len(self.docs) > COMPACT_THRESHOLD:
+            self._compact()
+        self._sorted_terms = None
+        return counts
+
+    def search(self, query: str, limit: int = 10, by_session: bool = False) -> List[Dict]:
+        """Entries matching every part of the query, best BM25 score first"""
+        clauses = []
+        for phrase, word in QUERY_PATTERN.findall(query):
+            terms = tokenize(phrase or word)
+            if not terms:
+                continue
+            if phrase and len(terms) > 1:
+                clauses.append(("phrase", terms))
+            elif word.endswith("*"):
+                clauses.append(("prefix", terms))
+            else:
+                clauses.extend(("term", [term]) for term in terms)
+        if not clauses or not self.live_docs:
+            return []
+
+        scores: Optional[Dict[int, float]] = None
+        for kind, terms in clauses:
+            if kind == "phrase":
+                matches = self._phrase_matches(terms)
+            elif kind == "prefix":
+                matches = self._prefix_matches(terms[0])
+            else:
+                matches = self._term_matches(terms[0])
+            # Every clause must match: intersect as we go
+            scores = matches if scores is None else {
+                doc_id: score + matches[doc_id] for doc_id, score in scores.items() if doc_id in matches
+            }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        hits, seen_sessions = [], set()
+        for doc_id, score in ranked:
+            path, timestamp, text, _ = self.docs[doc_id]
+            if by_session:
+                if path in seen_sessions:
+                    continue
+                seen_sessions.add(path)
+            hits.append({
+                "score": score, "session": path, "start_time": self.sessions[path]["start_time"],
+                "timestamp": timestamp, "text": text,
+            })
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def stats(self) -> Dict[str, int]:
+        return {"sessions": len(self.sessions), "entries": self.live_docs, "terms": len(self.postings)}
+
+    def _add(self, path, mtime, size, start_time, entries):
+        doc_ids = []
+        for timestamp, text in entries:
+            terms = tokenize(text)
+            doc_id = len(self.docs)
+            self.docs.append((path, timestamp, text, len(terms)))
+            for position, term in enumerate(terms):
+                self.postings[term].setdefault(doc_id, []).append(position)
+            self.total_length += len(terms)
+            self.live_docs += 1
+            doc_ids.append(doc_id)
+        self.sessions[path] = {"mtime": mtime, "size": size, "start_time": start_time, "docs": doc_ids}
+
+    def _remove(self, path):
+        """Tombstone a session's entries; their postings are dropped at the next compaction"""
+        for doc_id in self.sessions.pop(path)["docs"]:
+            self.total_length -= self.docs[doc_id][3]
+            self.live_docs -= 1
+            self.docs[doc_id] = None
+
+    def _compact(self):
+        """Renumber live entries and rebuild postings without the tombstoned ones"""
+        remap = {}
+        docs = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc is not None:
+                remap[doc_id] = len(docs)
+                docs.append(doc)
+        postings = defaultdict(dict)
+        for term, term_postings in self.postings.items():
+            for doc_id, positions in term_postings.items():
+                if doc_id in remap:
+                    postings[term][remap[doc_id]] = positions
+        for session in self.sessions.values():
+            session["docs"] = [remap[doc_id] for doc_id in session["docs"]]
+        self.docs, self.postings = docs, postings
+
+    def _bm25(self, term_postings: Dict[int, List[int]]) -> Dict[int, float]:
+        live = {doc_id: positions for doc_id, positions in term_postings.items() if self.docs[doc_id] is not None}
+        if not live:
+            return {}
+        idf = math.log(1 + (self.live_docs - len(live) + 0.5) / (len(live) + 0.5))
+        average_length = self.total_length / self.live_docs
+        scores = {}
+        for doc_id, positions in live.items():
+            frequency = len(positions)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc_id][3] / average_length)
+            scores[doc_id] = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def _term_matches(self, term: str) -> Dict[int, float]:
+        return self._bm25(self.postings.get(term, {}))
+
+    def _prefix_matches(self, prefix: str) -> Dict[int, float]:
+        """Union of all terms starting with the prefix, found by bisecting the sorted vocabulary"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        scores = defaultdict(float)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            for doc_id, score in self._term_matches(term).items():
+                scores[doc_id] += score
+        return scores
+
+    def _phrase_matches(self, terms: List[str]) -> Dict[int, float]:
+        """Entries containing the terms consecutively, scored as the sum of the terms' BM25"""
+        term_postings = [self.postings.get(term, {}) for term in terms]
+        candidates = set.intersection(*(set(postings) for postings in term_postings))
+        matching = set()
+        for doc_id in candidates:
+            starts = set(term_postings[0][doc_id])
+            for offset, postings in enumerate(term_postings[1:], start=1):
+                starts &= {position - offset for position in postings[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matching.add(doc_id)
+        scores = defaultdict(float)
+        for postings in term_postings:
+            for doc_id, score in self._bm25({doc_id: postings[doc_id] for doc_id in matching}).items():
+                scores[doc_id] += score
+        return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=INDEX_PATH, help="Index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_parser = commands.add_parser("index", help="Index new and changed session files")
+    index_parser.add_argument("directories", nargs="*", default=["."])
+    search_parser = commands.add_parser("search", help="Search indexed transcripts")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+    search_parser.add_argument("--by-session", action="store_true", help="Best matching entry per session only")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = SessionIndex.load(args.index)
+    loaded = time.perf_counter()
+    if args.command == "index":
+        counts = index.update(args.directories)
+        if counts["added"] or counts["updated"] or counts["removed"]:
+            index.save(args.index)
+        print(", ".join(f"{count} {name}" for name, count in counts.items()),
+              f"in {time.perf_counter() - start:.2f}s;", index.stats())
+        return
+
+    hits = index.search(args.query, limit=args.limit, by_session=args.by_session)
+    searched = time.perf_counter()
+    for hit in hits:
+        print(f"{hit['score']:6.2f}  {os.path.basename(hit['session'])}  {hit['timestamp']}  {hit['text']}")
+    print(f"{len(hits)} hits; search {(searched - loaded) * 1000:.1f} ms (index load {(loaded - start) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import SECTION_TRANSCRIPT, TEXT_SEPARATOR, ArchiveReader, write_archive  # noqa: E402
+from transcript_store import format_entry, format_timestamps  # noqa: E402
+
+START_MS = 1_700_000_000_000
+TRANSCRIPT = [(START_MS + i * 2500, f"entry {i} about pricing ü") for i in range(50)]
+SUGGESTIONS = [{"timestamp": "10:00:00", "text": "💡 Tip: anchor on ROI", "source": "llm"}]
+SESSION_INFO = {"start_time": "2024-01-01T10:00:00"}
+
+
+@pytest.mark.parametrize("compress_transcript", [True, False])
+@pytest.mark.parametrize("transcript", [
+    TRANSCRIPT,
+    [(time_ms, text + TEXT_SEPARATOR) for time_ms, text in TRANSCRIPT[:3]],  # Falls back to the lengths column
+    [],
+])
+def test_round_trip(transcript, compress_transcript):
+    reader = ArchiveReader(write_archive(transcript, SUGGESTIONS, SESSION_INFO, compress_transcript))
+    assert reader.session_info == SESSION_INFO
+    assert reader.count(SECTION_TRANSCRIPT) == len(transcript)
+    assert reader.transcript() == transcript
+    assert reader.suggestions() == SUGGESTIONS
+    assert reader.to_session_data() == {
+        "session_info": SESSION_INFO,
+        "transcript": [format_entry(time_ms, text) for time_ms, text in transcript],
+        "suggestions": SUGGESTIONS,
+    }
+
+
+def test_partial_load():
+    reader = ArchiveReader(write_archive(TRANSCRIPT, SUGGESTIONS, SESSION_INFO))
+    assert set(reader.to_session_data([SECTION_TRANSCRIPT])) == {"session_info", "transcript"}
+
+
+def test_format_timestamps_matches_format_entry():
+    times = [START_MS + i * 997_003 for i in range(200)]
+    assert format_timestamps(times) == [format_entry(time_ms, "")["timestamp"] for time_ms in times]
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_recorder import RATE, EndpointingChunker  # noqa: E402
+
+
+def speech_with_pauses(seconds, pauses):
+    """16-bit PCM bytes of loud noise with 0.5 s of silence starting at each of ``pauses`` (seconds)"""
+    samples = np.random.default_rng(0).standard_normal(int(seconds * RATE)) * 0.2
+    for start in pauses:
+        samples[int(start * RATE):int((start + 0.5) * RATE)] = 0
+    return (samples * 32767).astype(np.int16).tobytes()
+
+
+def cut_seconds(cut):
+    return cut / 2 / RATE
+
+
+def test_cut_in_latest_pause():
+    chunker = EndpointingChunker(target_seconds=2.0)
+    cut = chunker.find_cut(speech_with_pauses(3.0, [1.2, 2.0]))
+    assert cut_seconds(cut) == pytest.approx(2.25, abs=0.05)
+
+
+def test_pause_beyond_max_seconds_is_ignored():
+    # 10 s buffered with the only pause at 8 s: cut at max_seconds, not in the pause
+    chunker = EndpointingChunker(max_seconds=6.0)
+    cut = chunker.find_cut(speech_with_pauses(10.0, [8.0]))
+    assert cut_seconds(cut) == pytest.approx(6.0)
+
+
+def test_latest_pause_within_max_seconds_wins_over_later_ones():
+    chunker = EndpointingChunker(max_seconds=6.0)
+    cut = chunker.find_cut(speech_with_pauses(10.0, [4.0, 8.0]))
+    assert cut_seconds(cut) == pytest.approx(4.25, abs=0.05)
+
+
+def test_no_cut_before_target():
+    assert EndpointingChunker(target_seconds=2.0).find_cut(speech_with_pauses(1.5, [1.0])) is None
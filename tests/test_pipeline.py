@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import LivePipeline  # noqa: E402
+
+
+class SilentRecorder:
+    def __init__(self):
+        self.stopped = False
+
+    def get_audio_chunk(self):
+        return None
+
+    def stop_recording(self):
+        self.stopped = True
+
+
+class FakeJournal:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_pipeline_stops_when_ui_stops_polling():
+    recorder, journal = SilentRecorder(), FakeJournal()
+    pipeline = LivePipeline(recorder, None, None, journal=journal, idle_timeout=0.5)
+    pipeline.start()
+    assert wait_until(lambda: not pipeline.is_running)
+    assert pipeline.abandoned
+    assert recorder.stopped and journal.closed
+    _, _, errors = pipeline.drain_results()
+    assert any("Session stopped" in error for error in errors)
+
+
+def test_pipeline_keeps_running_while_ui_polls():
+    pipeline = LivePipeline(SilentRecorder(), None, None, journal=FakeJournal(), idle_timeout=0.5)
+    pipeline.start()
+    try:
+        seen = pipeline.update_count
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            seen = pipeline.wait_for_update(seen, timeout=0.1)
+        assert pipeline.is_running and not pipeline.abandoned
+    finally:
+        pipeline.stop()
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers import CircuitBreaker, ProviderRouter, is_transient  # noqa: E402
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ProviderRouter, "_backoff", staticmethod(lambda attempt: 0.0))
+
+
+def failing(error, calls):
+    def operation(provider):
+        calls.append(provider)
+        raise error
+    return operation
+
+
+@pytest.mark.parametrize("error, transient", [
+    (StatusError(400), False),
+    (StatusError(401), False),
+    (StatusError(413), False),
+    (StatusError(408), True),
+    (StatusError(409), True),
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (ConnectionError("reset"), True),
+    (TimeoutError(), True),
+    (ValueError("bad"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) == transient
+
+
+def test_client_error_is_raised_once_and_leaves_circuits_closed():
+    router = ProviderRouter(["groq", "openai"])
+    calls = []
+    for _ in range(CircuitBreaker().failure_threshold + 1):
+        with pytest.raises(StatusError):
+            router.call(failing(StatusError(400), calls))
+    assert calls == ["groq"] * (CircuitBreaker().failure_threshold + 1)
+    assert set(router.stats()["circuits"].values()) == {CircuitBreaker.CLOSED}
+    assert router.call(lambda provider: provider) == "groq"
+
+
+def test_server_error_is_retried_and_fails_over():
+    router = ProviderRouter(["groq", "openai"], max_retries=2)
+    calls = []
+    with pytest.raises(StatusError):
+        router.call(failing(StatusError(503), calls))
+    assert calls == ["groq"] * 3 + ["openai"] * 3
+    assert set(router.stats()["circuits"].values()) == {CircuitBreaker.OPEN}
+
+
+def test_connection_error_fails_over():
+    router = ProviderRouter(["groq", "openai"], max_retries=0)
+
+    def operation(provider):
+        if provider == "groq":
+            raise ConnectionError("reset")
+        return provider
+
+    assert router.call(operation) == "openai"
+    assert router.stats()["failovers"] == 1
+
+
+def test_client_error_releases_half_open_probe():
+    router = ProviderRouter(["groq"])
+    breaker = router.breakers["groq"]
+    breaker.state, breaker.opened_at = CircuitBreaker.OPEN, -breaker.reset_timeout
+    with pytest.raises(StatusError):
+        router.call(failing(StatusError(400), []))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert router.call(lambda provider: provider) == "groq"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_client_error_is_raised_without_failover():
+    router = ProviderRouter(["groq", "openai"], hedge=True)
+    calls = []
+    with pytest.raises(StatusError):
+        router.call(failing(StatusError(400), calls))
+    assert calls == ["groq"]
+    assert set(router.stats()["circuits"].values()) == {CircuitBreaker.CLOSED}
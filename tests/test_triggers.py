@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triggers import MAX_INTERVAL, REASON_TURN_END, SuggestionTrigger  # noqa: E402
+
+TICK = 0.1  # The suggestion worker polls at this interval
+
+
+def simulate(trigger, entry_times, duration, text="and then we talked about the roadmap"):
+    """Feed entries at the given times and poll every TICK; return the reasons fired"""
+    entries = sorted(entry_times)
+    fired = []
+    for step in range(int(duration / TICK) + 1):
+        now = step * TICK
+        while entries and entries[0] <= now:
+            trigger.on_transcript(text, now=entries.pop(0))
+        reason = trigger.poll(now=now)
+        if reason:
+            fired.append(reason)
+    return fired
+
+
+def test_continuous_speech_fires_only_on_max_interval():
+    # One entry per 2 s chunk for a minute, nobody pausing
+    fired = simulate(SuggestionTrigger(), [2.0 * i for i in range(1, 31)], 60.0)
+    assert REASON_TURN_END not in fired
+    assert len(fired) <= 60 / MAX_INTERVAL + 1
+    assert len(fired) < 20  # The old fixed 3 s timer
+
+
+def test_slower_chunk_cadence_is_learned():
+    trigger = SuggestionTrigger()
+    fired = simulate(trigger, [3.0 * i for i in range(1, 21)], 60.0)
+    assert REASON_TURN_END not in fired
+    assert 2.9 < trigger.entry_interval < 3.1
+
+
+def test_seeded_chunk_cadence():
+    fired = simulate(SuggestionTrigger(entry_interval=5.0), [5.0 * i for i in range(1, 13)], 60.0)
+    assert REASON_TURN_END not in fired
+
+
+def test_pause_after_speech_ends_the_turn():
+    trigger = SuggestionTrigger()
+    fired = simulate(trigger, [2.0, 4.0, 6.0], 12.0)
+    assert fired == [REASON_TURN_END]
+    # The entry cadence plus the turn gap after the last entry
+    assert trigger._last_fired == pytest.approx(6.0 + 2.0 + 1.5, abs=0.15)
+
+
+def test_trigger_phrase_fires_after_debounce():
+    fired = simulate(SuggestionTrigger(), [2.0], 3.0, text="what about the pricing")
+    assert fired == ["phrase"]
@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_recorder import RATE, VoiceActivityDetector  # noqa: E402
+
+
+def make_wav(samples, channels=1, sample_width=2):
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(samples.tobytes())
+    return output.getvalue()
+
+
+def to_int16(signal):
+    return (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+@pytest.fixture
+def speech_samples():
+    """1 s of a voiced-like signal: a 150 Hz tone with harmonics, syllable-modulated"""
+    t = np.arange(RATE) / RATE
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 4 * t))
+    return to_int16(0.2 * voiced * envelope)
+
+
+@pytest.fixture
+def silence_samples():
+    """1 s of faint background noise"""
+    return to_int16(np.random.default_rng(0).standard_normal(RATE) * 0.001)
+
+
+@pytest.fixture
+def speech_wav(speech_samples):
+    return make_wav(speech_samples)
+
+
+@pytest.fixture
+def silence_wav(silence_samples):
+    return make_wav(silence_samples)
+
+
+def test_classify_wav_speech(speech_wav):
+    vad = VoiceActivityDetector()
+    flags = vad.classify_wav(speech_wav)
+    assert len(flags) == RATE // vad.frame_length
+    assert flags.all()
+
+
+def test_classify_wav_silence(silence_wav):
+    flags = VoiceActivityDetector().classify_wav(silence_wav)
+    assert len(flags) > 0
+    assert not flags.any()
+
+
+def test_classify_wav_downmixes_stereo(speech_samples, silence_samples):
+    stereo = np.column_stack([speech_samples, silence_samples]).ravel()
+    flags = VoiceActivityDetector().classify_wav(make_wav(stereo, channels=2))
+    assert flags.all()
+
+
+def test_classify_wav_rejects_8_bit():
+    with pytest.raises(ValueError):
+        VoiceActivityDetector().classify_wav(make_wav(np.zeros(RATE, dtype=np.uint8), sample_width=1))
+
+
+def test_hangover_bridges_short_pause(speech_samples, silence_samples):
+    vad = VoiceActivityDetector()
+    pause = silence_samples[:RATE // 10]
+    flags = vad.classify_frames(np.concatenate([speech_samples, pause, speech_samples]))
+    assert flags.all()
+
+
+def test_is_speech_counts_skipped_chunks(speech_samples, silence_samples):
+    vad = VoiceActivityDetector()
+    assert vad.is_speech(speech_samples.tobytes())
+    assert not vad.is_speech(silence_samples.tobytes())
+    assert not vad.is_speech(silence_samples.tobytes())
+    assert vad.stats() == {"checked": 3, "skipped": 2}
+
+
+def test_is_speech_skips_blip_shorter_than_min_speech(speech_samples, silence_samples):
+    vad = VoiceActivityDetector()
+    blip = silence_samples.copy()
+    blip[:RATE // 20] = speech_samples[:RATE // 20]
+    assert not vad.is_speech(blip.tobytes())
+    assert vad.stats() == {"checked": 1, "skipped": 1}
+
+
+def test_is_speech_skips_click(silence_samples):
+    vad = VoiceActivityDetector()
+    click = silence_samples.copy()
+    click[RATE // 2:RATE // 2 + RATE * 33 // 1000] = to_int16(
+        np.random.default_rng(1).standard_normal(RATE * 33 // 1000) * 0.5
+    )
+    assert vad.classify_frames(click).sum() > vad.min_speech_frames  # The hangover stretches it
+    assert not vad.is_speech(click.tobytes())
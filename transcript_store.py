@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Configuration
+MEMORY_ENTRIES = 2000   # Entries kept in memory; older ones are spilled to disk
+SPILL_FRACTION = 0.5    # Share of the in-memory entries written out per spill
+
+
+def format_entry(time_ms: int, text: str) -> Dict[str, str]:
+    """The ``{"timestamp", "text"}`` dict the UI and export use"""
+    return {"timestamp": datetime.fromtimestamp(time_ms / 1000).strftime("%H:%M:%S"), "text": text}
+
+
+_HOURS_MINUTES = [f"{hour:02d}:{minute:02d}:" for hour in range(24) for minute in range(60)]
+_SECONDS = [f"{second:02d}" for second in range(60)]
+
+
+def format_timestamps(times_ms) -> List[str]:
+    """The ``format_entry`` timestamps of many entries (a list or int64 array), without a datetime per entry.
+
+    One UTC offset is used for the whole list; a list spanning a daylight
+    saving change is formatted entry by entry instead.
+    """
+    if not len(times_ms):
+        return []
+    offset = time.localtime(int(times_ms[0]) // 1000).tm_gmtoff
+    if time.localtime(int(times_ms[-1]) // 1000).tm_gmtoff != offset:
+        return [format_entry(int(time_ms), "")["timestamp"] for time_ms in times_ms]
+    seconds_of_day = (np.asarray(times_ms, dtype=np.int64) // 1000 + offset) % 86400
+    minutes, seconds = np.divmod(seconds_of_day, 60)
+    return list(map(str.__add__, map(_HOURS_MINUTES.__getitem__, minutes.tolist()),
+                    map(_SECONDS.__getitem__, seconds.tolist())))
+
+
+class TranscriptStore:
+    """Append-only call transcript with compact records and bounded memory.
+
+    Entries are stored as two columns: an ``array`` of epoch-millisecond
+    timestamps and a list of text strings, and only formatted into dicts
+    when read. Beyond ``memory_entries``, the oldest entries are appended
+    to an NDJSON spill file, so memory stays flat on multi-hour calls while
+    ``recent()`` remains O(n) in the entries asked for and ``entries()``
+    still yields the whole call.
+    """
+
+    def __init__(self, memory_entries=MEMORY_ENTRIES, spill_dir: Optional[str] = None):
+        self.memory_entries = max(2, int(memory_entries))
+        self.spill_dir = spill_dir
+        self._times = array("q")
+        self._texts: List[str] = []
+        self._spill_path = None
+        self.spilled = 0
+
+    def __len__(self):
+        return self.spilled + len(self._texts)
+
+    def append(self, text: str, time_ms: int) -> Dict[str, str]:
+        """Add an entry and return it formatted for display"""
+        self._times.append(int(time_ms))
+        self._texts.append(text)
+        if len(self._texts) > self.memory_entries:
+            self._spill(int(self.memory_entries * SPILL_FRACTION) or 1)
+        return format_entry(time_ms, text)
+
+    def recent(self, count: int) -> List[Dict[str, str]]:
+        """The last ``count`` entries (from memory), oldest first"""
+        start = max(len(self._texts) - count, 0)
+        return [format_entry(self._times[i], self._texts[i]) for i in range(start, len(self._texts))]
+
+    def entries(self) -> Iterator[Dict[str, str]]:
+        """Every entry of the call, oldest first, reading spilled ones back from disk"""
+        if self._spill_path:
+            with open(self._spill_path, encoding="utf-8") as spill_file:
+                for line in spill_file:
+                    time_ms, text = json.loads(line)
+                    yield format_entry(time_ms, text)
+        for time_ms, text in zip(self._times, self._texts):
+            yield format_entry(time_ms, text)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the in-memory entries"""
+        return (sys.getsizeof(self._times) + sys.getsizeof(self._texts)
+                + sum(sys.getsizeof(text) for text in self._texts))
+
+    def close(self):
+        """Delete the spill file"""
+        if self._spill_path:
+            try:
+                os.remove(self._spill_path)
+            except OSError:
+                pass
+            self._spill_path = None
+
+    def _spill(self, count: int):
+        """Move the oldest ``count`` entries from memory to the spill file"""
+        if not self._spill_path:
+            handle, self._spill_path = tempfile.mkstemp(prefix="transcript_", suffix=".ndjson", dir=self.spill_dir)
+            os.close(handle)
+        with open(self._spill_path, "a", encoding="utf-8") as spill_file:
+            spill_file.writelines(
+                json.dumps([self._times[i], self._texts[i]], ensure_ascii=False) + "\n" for i in range(count)
+            )
+        del self._times[:count]
+        del self._texts[:count]
+        self.spilled += count
+
+    def __del__(self):
+        self.close()
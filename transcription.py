@@ -1,55 +1,153 @@
-import streamlit as st
 import io
-import os
-import openai
-from groq import Groq
-from typing import Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
 from datetime import datetime
+from audio_recorder import preprocess_audio
+from providers import ProviderRouter, get_client_pool, provider_order
+from ratelimit import PRIORITY_TRANSCRIPTION, SHARED_RATE_LIMITER
+
+# Configuration
+MAX_IN_FLIGHT_TRANSCRIPTIONS = 3  # Chunk requests kept in flight at once
+LAG_WINDOW = 50                   # Chunks used for the lag metric
 
 class TranscriptionService:
-    def __init__(self, service_type="groq"):
+    def __init__(self, service_type="groq", preprocess=True, compact_upload=True, failover=True, hedge=False,
+                 rate_limiter=None, client_pool=None, priority=PRIORITY_TRANSCRIPTION):
         self.service_type = service_type
-        self.openai_client = None
-        self.groq_client = None
+        self.priority = priority              # Live chunks go first; recorded calls use PRIORITY_BATCH
+        self.preprocess = preprocess          # Downmix/resample to 16 kHz mono before upload
+        self.compact_upload = compact_upload  # Encode as FLAC when possible
         
-        if service_type == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
-        elif service_type == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if api_key:
-                self.groq_client = Groq(api_key=api_key)
+        # The selected service comes first; the other one is only a fallback
+        providers = provider_order(service_type) if failover else [service_type]
+        # Clients come from the process-wide pool so sessions share warm connections
+        self.client_pool = client_pool if client_pool is not None else get_client_pool()
+        self.clients = {}
+        for provider in providers:
+            client = self.client_pool.get(provider)
+            if client:
+                self.clients[provider] = client
+        self.router = ProviderRouter([p for p in providers if p in self.clients], hedge=hedge)
+        # Shared with the LLM assistant so transcription can claim quota first
+        self.rate_limiter = rate_limiter if rate_limiter is not None else SHARED_RATE_LIMITER
     
     def transcribe_audio(self, audio_data: bytes) -> Optional[str]:
-        """Transcribe audio data to text"""
+        """Transcribe audio data to text, retrying and failing over between providers.
+
+        Raises once every provider has failed. This runs on worker threads,
+        where ``st.error`` would be dropped, so callers report the error.
+        """
+        if not self.clients:
+            # Fallback: Mock transcription for demo
+            return f"[Mock transcription at {datetime.now().strftime('%H:%M:%S')}]"
+        
+        file_format = "wav"
+        if self.preprocess:
+            audio_data, file_format = preprocess_audio(audio_data, self.compact_upload)
+        return self.router.call(lambda provider: self._transcribe_with(provider, audio_data, file_format))
+    
+    def _transcribe_with(self, provider: str, audio_data: bytes, file_format: str) -> str:
+        """One transcription request; raises so the router can retry or fail over"""
+        # A fresh file-like object per attempt, since hedged attempts run concurrently
+        audio_file = io.BytesIO(audio_data)
+        audio_file.name = f"audio.{file_format}"
+        
+        create = self.clients[provider].audio.transcriptions.with_raw_response.create
+        if provider == "groq":
+            # Groq uses Whisper models for transcription
+            transcription = self.rate_limiter.call(
+                provider, self.priority, create,
+                file=audio_file,
+                model="whisper-large-v3",  # Groq's Whisper model
+                response_format="text"
+            )
+        else:
+            transcription = self.rate_limiter.call(
+                provider, self.priority, create,
+                model="whisper-1",
+                file=audio_file,
+                response_format="text"
+            )
+        return transcription.strip()
+    
+    def provider_stats(self) -> Dict[str, object]:
+        """Retries, failovers, hedges and circuit states of the transcription providers"""
+        return self.router.stats()
+
+class ConcurrentTranscriber:
+    """Keeps several chunk transcriptions in flight and releases them in capture order.
+
+    Each submitted chunk gets a sequence number; finished requests wait in a
+    reorder buffer until every earlier chunk is done, then ``on_result`` is
+    called with ``(sequence, text, captured_at)`` strictly in sequence order.
+    ``on_latency``, if given, receives each request's round trip in seconds,
+    and ``on_error`` the exception of each failed request (its text is None).
+    """
+
+    def __init__(self, transcription_service, on_result, max_in_flight=MAX_IN_FLIGHT_TRANSCRIPTIONS,
+                 on_latency=None, on_error=None):
+        self.transcription_service = transcription_service
+        self.on_result = on_result
+        self.on_latency = on_latency
+        self.on_error = on_error
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="stt")
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._next_sequence = 0
+        self._next_to_release = 0
+        self._finished = {}
+        self.lags = deque(maxlen=LAG_WINDOW)
+
+    def submit(self, audio_data: bytes, captured_at: Optional[float] = None, timeout: Optional[float] = None) -> bool:
+        """Queue a chunk for transcription, waiting for a free slot. Returns False on timeout."""
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        captured_at = captured_at if captured_at is not None else time.time()
+        submitted_at = time.time()
+        future = self.executor.submit(self.transcription_service.transcribe_audio, audio_data)
+        future.add_done_callback(lambda f: self._on_done(sequence, captured_at, submitted_at, f))
+        return True
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._next_sequence - self._next_to_release
+
+    def lag_stats(self) -> Dict[str, float]:
+        """Capture-to-transcript lag in seconds over the recent chunks"""
+        lags = list(self.lags)
+        if not lags:
+            return {"last": 0.0, "average": 0.0, "max": 0.0}
+        return {"last": lags[-1], "average": sum(lags) / len(lags), "max": max(lags)}
+
+    def shutdown(self, wait=True):
+        """Stop accepting chunks; with wait=True finish and release the ones in flight"""
+        self.executor.shutdown(wait=wait)
+
+    def _on_done(self, sequence, captured_at, submitted_at, future):
         try:
-            if self.service_type == "groq" and self.groq_client:
-                # Create a temporary file-like object
-                audio_file = io.BytesIO(audio_data)
-                audio_file.name = "audio.wav"
-                
-                # Groq uses Whisper models for transcription
-                transcription = self.groq_client.audio.transcriptions.create(
-                    file=audio_file,
-                    model="whisper-large-v3",  # Groq's Whisper model
-                    response_format="text"
-                )
-                return transcription.strip()
-            elif self.service_type == "openai" and self.openai_client:
-                # Keep OpenAI as fallback option
-                audio_file = io.BytesIO(audio_data)
-                audio_file.name = "audio.wav"
-                
-                response = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-                return response.strip()
-            else:
-                # Fallback: Mock transcription for demo
-                return f"[Mock transcription at {datetime.now().strftime('%H:%M:%S')}]"
+            text = future.result()
         except Exception as e:
-            st.error(f"Transcription error: {e}")
-            return None
\ No newline at end of file
+            text = None  # A failed chunk must still advance the sequence
+            if self.on_error:
+                self.on_error(e)
+        if self.on_latency:
+            self.on_latency(time.time() - submitted_at)
+
+        with self._lock:
+            self._finished[sequence] = (text, captured_at)
+            # Release every consecutive finished chunk, in capture order
+            while self._next_to_release in self._finished:
+                ready_sequence = self._next_to_release
+                ready_text, ready_captured_at = self._finished.pop(ready_sequence)
+                self._next_to_release += 1
+                self.lags.append(time.time() - ready_captured_at)
+                self._slots.release()
+                self.on_result(ready_sequence, ready_text, ready_captured_at)
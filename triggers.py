@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Configuration
+DEBOUNCE_SECONDS = 0.75     # Wait this long for more speech before firing on new content
+TURN_GAP_SECONDS = 1.5      # Silence beyond the usual gap between entries that ends a speaker turn
+ENTRY_INTERVAL = 2.0        # Gap between entries during speech (one per chunk) until measured
+INTERVAL_SMOOTHING = 0.3    # Weight of the newest gap in the moving average
+MIN_INTERVAL = 1.5          # Never fire more often than this
+MAX_INTERVAL = 8.0          # Fire at least this often while new content keeps arriving
+
+# Phrases that deserve an immediate suggestion
+TRIGGER_PHRASES = [
+    "price", "pricing", "cost", "expensive", "budget", "discount",
+    "competitor", "competition", "alternative", "other vendor",
+    "not interested", "no thanks", "too busy", "call me back",
+    "contract", "sign", "next steps", "decision maker", "timeline",
+]
+
+REASON_PHRASE = "phrase"
+REASON_TURN_END = "turn_end"
+REASON_MAX_INTERVAL = "max_interval"
+
+
+class SuggestionTrigger:
+    """Decides when to ask the LLM for a suggestion, based on what was said.
+
+    Nothing fires without new transcript content. New content fires once
+    the speaker pauses, after a short ``debounce`` when it contains a
+    trigger phrase, or after ``max_interval`` during a long monologue.
+    ``min_interval`` caps the request rate in every case.
+
+    Entries arrive once per audio chunk while someone speaks, and silent
+    chunks are dropped by the recorder's VAD, so a pause shows up as
+    entries stopping. A turn ends when no entry arrived for ``turn_gap``
+    seconds beyond the usual gap between entries: ``entry_interval``, which
+    the pipeline seeds with the chunker's target length and which follows
+    the measured gaps. Continuous speech never looks like a turn end.
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None, debounce=DEBOUNCE_SECONDS,
+                 turn_gap=TURN_GAP_SECONDS, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 entry_interval=ENTRY_INTERVAL):
+        self.debounce = debounce
+        self.turn_gap = turn_gap
+        self.entry_interval = entry_interval  # Moving average of the gap between entries during speech
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        phrases = TRIGGER_PHRASES if phrases is None else phrases
+        self.pattern = None
+        if phrases:
+            # One alternation compiled once, longest phrases first
+            ordered = sorted(phrases, key=len, reverse=True)
+            self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in ordered) + r")\b", re.IGNORECASE)
+
+        self._lock = threading.Lock()
+        self._pending_since = None   # First unanswered content
+        self._last_content = None    # Latest unanswered content
+        self._urgent = False
+        self._turn_ended = False     # A turn end fired since the latest entry
+        self._last_fired = 0.0
+        self.fired = {REASON_PHRASE: 0, REASON_TURN_END: 0, REASON_MAX_INTERVAL: 0}
+        self.entries_seen = 0
+
+    def on_transcript(self, text: str, now: Optional[float] = None):
+        """Register a new transcript entry"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.entries_seen += 1
+            if self._last_content is not None and not self._turn_ended:
+                gap = now - self._last_content
+                if gap < self.max_interval:
+                    # Same turn: a sample of the chunk cadence
+                    self.entry_interval += INTERVAL_SMOOTHING * (gap - self.entry_interval)
+            self._turn_ended = False
+            if self._pending_since is None:
+                self._pending_since = now
+            self._last_content = now
+            if self.pattern and self.pattern.search(text):
+                self._urgent = True
+
+    def poll(self, now: Optional[float] = None) -> Optional[str]:
+        """Return the reason to fire now (and reset), or None to keep waiting"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._pending_since is None or now - self._last_fired < self.min_interval:
+                return None
+
+            quiet_for = now - self._last_content
+            if self._urgent and quiet_for >= self.debounce:
+                reason = REASON_PHRASE
+            elif quiet_for >= self.entry_interval + self.turn_gap:
+                reason = REASON_TURN_END
+            elif now - max(self._pending_since, self._last_fired) >= self.max_interval:
+                reason = REASON_MAX_INTERVAL
+            else:
+                return None
+
+            self._pending_since = None
+            self._urgent = False
+            self._turn_ended = reason == REASON_TURN_END
+            self._last_fired = now
+            self.fired[reason] += 1
+            return reason
+
+    def stats(self) -> Dict[str, int]:
+        """Requests fired per reason and transcript entries seen"""
+        with self._lock:
+            return dict(self.fired, total=sum(self.fired.values()), entries=self.entries_seen)
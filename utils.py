@@ -1,20 +1,24 @@
 import streamlit as st
-import json
-import time
 from datetime import datetime
-from audio_recorder import AudioRecorder
-from transcription import TranscriptionService
+from audio_recorder import AudioRecorder, VoiceActivityDetector, VAD_ENERGY_THRESHOLD, VAD_HANGOVER_MS
+from transcription import TranscriptionService, MAX_IN_FLIGHT_TRANSCRIPTIONS
 from llm_assistant import LLMAssistant
+from pipeline import LivePipeline, OVERFLOW_COALESCE
+from transcript_store import TranscriptStore, format_entry
+from ratelimit import PRIORITY_BATCH
+from journal import SessionJournal, clear_scan_cache, is_recoverable
+from archive import ARCHIVE_EXTENSION
+from batch import BatchTranscriber, STAGE_TRANSCRIBE
 
 # Configuration
-LLM_UPDATE_INTERVAL = 3   # Update LLM suggestions every 3 seconds
+MAX_SUGGESTIONS = 10      # Suggestions kept in session state
 
 def initialize_session_state():
     """Initialize Streamlit session state variables"""
     if 'is_recording' not in st.session_state:
         st.session_state.is_recording = False
     if 'transcript' not in st.session_state:
-        st.session_state.transcript = []
+        st.session_state.transcript = TranscriptStore()
     if 'suggestions' not in st.session_state:
         st.session_state.suggestions = []
     if 'session_start_time' not in st.session_state:
@@ -25,23 +29,72 @@ def initialize_session_state():
         st.session_state.transcription_service = TranscriptionService("groq")  # Use Groq by default
     if 'llm_assistant' not in st.session_state:
         st.session_state.llm_assistant = LLMAssistant("groq")  # Use Groq by default
-    if 'last_llm_update' not in st.session_state:
-        st.session_state.last_llm_update = 0
+    if 'pipeline' not in st.session_state:
+        st.session_state.pipeline = None
+    if 'journal' not in st.session_state:
+        st.session_state.journal = None
+    if 'max_in_flight' not in st.session_state:
+        st.session_state.max_in_flight = MAX_IN_FLIGHT_TRANSCRIPTIONS
+    if 'vad_threshold' not in st.session_state:
+        st.session_state.vad_threshold = VAD_ENERGY_THRESHOLD
+    if 'vad_hangover_ms' not in st.session_state:
+        st.session_state.vad_hangover_ms = VAD_HANGOVER_MS
+    if 'overflow_policy' not in st.session_state:
+        st.session_state.overflow_policy = OVERFLOW_COALESCE
+    if 'stream_suggestions' not in st.session_state:
+        st.session_state.stream_suggestions = True
+    if 'structured_suggestions' not in st.session_state:
+        st.session_state.structured_suggestions = False
+    if 'failover' not in st.session_state:
+        st.session_state.failover = True
+    if 'hedge_requests' not in st.session_state:
+        st.session_state.hedge_requests = False
 
 def start_session():
     """Start recording session"""
-    st.session_state.audio_recorder = AudioRecorder()
+    vad = VoiceActivityDetector(
+        energy_threshold=st.session_state.vad_threshold,
+        hangover_ms=st.session_state.vad_hangover_ms
+    )
+    # Open provider connections while the microphone starts, so the first chunk skips the handshake
+    transcription_service = st.session_state.transcription_service
+    llm_assistant = st.session_state.llm_assistant
+    transcription_service.client_pool.warm(sorted(set(transcription_service.clients) | set(llm_assistant.clients)))
+    
+    st.session_state.audio_recorder = AudioRecorder(vad=vad)
     if st.session_state.audio_recorder.start_recording():
         st.session_state.is_recording = True
         st.session_state.session_start_time = datetime.now()
-        st.session_state.transcript = []
+        st.session_state.transcript.close()
+        st.session_state.transcript = TranscriptStore()
         st.session_state.suggestions = []
+        st.session_state.llm_assistant.conversation_context.clear()
+        if st.session_state.journal:
+            st.session_state.journal.close()
+        st.session_state.journal = SessionJournal()
+        st.session_state.pipeline = LivePipeline(
+            st.session_state.audio_recorder,
+            st.session_state.transcription_service,
+            st.session_state.llm_assistant,
+            max_in_flight=st.session_state.max_in_flight,
+            overflow_policy=st.session_state.overflow_policy,
+            stream_suggestions=st.session_state.stream_suggestions,
+            structured_suggestions=st.session_state.structured_suggestions,
+            journal=st.session_state.journal
+        )
+        st.session_state.pipeline.start()
         st.success("��️ Recording started!")
     else:
         st.error("Failed to start recording")
 
 def stop_session():
     """Stop recording session"""
+    if st.session_state.pipeline:
+        st.session_state.pipeline.stop()
+        process_audio_chunk()  # Collect results finished before shutdown
+    st.session_state.pipeline = None
+    if st.session_state.journal:
+        st.session_state.journal.close()
     if st.session_state.audio_recorder:
         st.session_state.audio_recorder.stop_recording()
         st.session_state.audio_recorder.cleanup()
@@ -50,65 +103,148 @@ def stop_session():
     st.success("🛑 Recording stopped!")
 
 def process_audio_chunk():
-    """Process audio chunk for transcription and suggestions"""
-    if not st.session_state.is_recording or not st.session_state.audio_recorder:
+    """Collect transcript entries and suggestions produced by the background pipeline.
+
+    Returns the new ``(transcript_entries, suggestion_entries)``.
+    """
+    pipeline = st.session_state.pipeline
+    if not pipeline:
+        return [], []
+    
+    transcript_entries, suggestion_entries, errors = pipeline.drain_results()
+    transcript_entries = [
+        st.session_state.transcript.append(entry["text"], entry["time_ms"]) for entry in transcript_entries
+    ]
+    
+    if suggestion_entries:
+        st.session_state.suggestions.extend(suggestion_entries)
+        # Keep only recent suggestions
+        st.session_state.suggestions = st.session_state.suggestions[-MAX_SUGGESTIONS:]
+    
+    for error in errors:
+        st.error(error)
+    if pipeline.abandoned:
+        # The watchdog already stopped the workers while nobody was watching
+        stop_session()
+    return transcript_entries, suggestion_entries
+
+def recover_session(path):
+    """Load a session that was interrupted (browser or server crash) from its journal"""
+    if not is_recoverable(path):
+        # Recovered by someone else since the list was shown, or its session turned out to be live
+        clear_scan_cache()
+        st.warning("That session is no longer available for recovery")
         return
+    journal = SessionJournal(path=path)
+    transcript_entries, suggestions = journal.load()
+    journal.close()  # Recovered: no longer offered for recovery
+    clear_scan_cache()
     
-    # Get audio chunk
-    audio_data = st.session_state.audio_recorder.get_audio_chunk()
-    if not audio_data:
+    if st.session_state.journal:
+        st.session_state.journal.close()
+    st.session_state.journal = journal
+    st.session_state.transcript.close()
+    st.session_state.transcript = TranscriptStore()
+    for time_ms, text in transcript_entries:
+        st.session_state.transcript.append(text, time_ms)
+    st.session_state.suggestions = suggestions[-MAX_SUGGESTIONS:]
+    st.session_state.session_start_time = (
+        datetime.fromisoformat(journal.start_time) if journal.start_time else None
+    )
+    st.success(f"♻️ Recovered {len(transcript_entries)} transcript entries and {len(suggestions)} suggestions")
+
+def process_recording(audio_data):
+    """Transcribe an uploaded call recording in parallel chunks and suggest for the whole call"""
+    progress = st.progress(0.0, text="Decoding recording...")
+    def on_progress(stage, done, total):
+        label = "Transcribing chunks" if stage == STAGE_TRANSCRIBE else "Generating suggestions"
+        progress.progress(done / total, text=f"{label}: {done}/{total}")
+    
+    # Separate services, so the recording doesn't mix with the live call's context; nobody is
+    # waiting live on it, so its requests queue for quota behind live sessions instead of being shed
+    transcription_service = TranscriptionService(
+        st.session_state.transcription_service.service_type,
+        failover=st.session_state.failover,
+        hedge=st.session_state.hedge_requests,
+        priority=PRIORITY_BATCH
+    )
+    live_assistant = st.session_state.llm_assistant
+    llm_assistant = LLMAssistant(
+        live_assistant.model_type,
+        failover=st.session_state.failover,
+        hedge=st.session_state.hedge_requests,
+        priority=PRIORITY_BATCH
+    )
+    result = BatchTranscriber(transcription_service, llm_assistant).run(audio_data, on_progress)
+    progress.empty()
+    if result is None:
+        st.error("Could not decode the recording (formats other than WAV need the soundfile package)")
         return
     
-    # Transcribe audio
-    transcript_text = st.session_state.transcription_service.transcribe_audio(audio_data)
-    if transcript_text and transcript_text.strip():
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        transcript_entry = {
-            "timestamp": timestamp,
-            "text": transcript_text
-        }
-        st.session_state.transcript.append(transcript_entry)
+    # The recording becomes a finished session: shown, exportable and searchable like a live one
+    if st.session_state.journal:
+        st.session_state.journal.close()
+    journal = SessionJournal()
+    start_time = datetime.fromisoformat(journal.start_time)
+    start_ms = int(start_time.timestamp() * 1000)
+    st.session_state.transcript.close()
+    st.session_state.transcript = TranscriptStore()
+    for offset_ms, text in result["transcript"]:
+        journal.add_transcript(start_ms + offset_ms, text)
+        st.session_state.transcript.append(text, start_ms + offset_ms)
+    suggestions = [
+        {"timestamp": format_entry(start_ms + offset_ms, "")["timestamp"], **suggestion, "source": "llm"}
+        for offset_ms, suggestion in result["suggestions"]
+    ]
+    for suggestion in suggestions:
+        journal.add_suggestion(suggestion)
+    journal.close()
+    st.session_state.journal = journal
+    # Keep the most important suggestions of the call, in call order
+    top = sorted(suggestions, key=lambda suggestion: suggestion.get("priority", 0.0), reverse=True)[:MAX_SUGGESTIONS]
+    st.session_state.suggestions = [suggestion for suggestion in suggestions if suggestion in top]
+    st.session_state.session_start_time = start_time
     
-    # Update LLM suggestions periodically
-    current_time = time.time()
-    if current_time - st.session_state.last_llm_update > LLM_UPDATE_INTERVAL:
-        if st.session_state.transcript:
-            # Get recent transcript for context
-            recent_transcript = " ".join([entry["text"] for entry in st.session_state.transcript[-5:]])
-            suggestions = st.session_state.llm_assistant.get_suggestions(recent_transcript)
-            
-            for suggestion in suggestions:
-                suggestion_entry = {
-                    "timestamp": datetime.now().strftime("%H:%M:%S"),
-                    "text": suggestion
-                }
-                st.session_state.suggestions.append(suggestion_entry)
-            
-            # Keep only recent suggestions
-            st.session_state.suggestions = st.session_state.suggestions[-10:]
-        
-        st.session_state.last_llm_update = current_time
+    audio_minutes = result["audio_seconds"] / 60
+    wall_minutes = result["wall_seconds"] / 60
+    st.success(
+        f"📼 Transcribed {audio_minutes:.1f} min of audio in {result['wall_seconds']:.0f} s "
+        f"({audio_minutes / wall_minutes if wall_minutes else 0:.1f} audio-min per minute): "
+        f"{result['chunks']} chunks, {len(result['transcript'])} transcript entries, {len(suggestions)} suggestions"
+    )
+    for error in dict.fromkeys(result["errors"]):
+        st.error(error)
+    if result["failed_chunks"]:
+        st.warning(f"{result['failed_chunks']} chunks could not be transcribed and are missing from the transcript")
+    if result["unsuggested_sections"]:
+        starts = ", ".join(
+            format_entry(start_ms + offset_ms, "")["timestamp"] for offset_ms in result["unsuggested_sections"]
+        )
+        st.warning(
+            f"{len(result['unsuggested_sections'])} of {result['sections']} call sections got no suggestions "
+            f"(quota exhausted or request failed), starting at {starts}"
+        )
 
 def export_session_data():
-    """Export session data as JSON"""
-    if not st.session_state.transcript and not st.session_state.suggestions:
+    """Offer the session as JSON, built from the journal only when download is clicked"""
+    journal = st.session_state.journal
+    if not journal:
         st.warning("No data to export")
         return
     
-    session_data = {
-        "session_info": {
-            "start_time": st.session_state.session_start_time.isoformat() if st.session_state.session_start_time else None,
-            "export_time": datetime.now().isoformat()
-        },
-        "transcript": st.session_state.transcript,
-        "suggestions": st.session_state.suggestions
-    }
-    
-    json_data = json.dumps(session_data, indent=2)
-    
     st.download_button(
         label="📥 Download Session Data",
-        data=json_data,
+        data=journal.export_json,  # Called on click, not on every rerun
         file_name=f"sales_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-        mime="application/json"
-    )
\ No newline at end of file
+        mime="application/json",
+        on_click="ignore"
+    )
+    st.download_button(
+        label="📦 Download Compact Archive",
+        data=journal.export_archive,
+        file_name=f"sales_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ARCHIVE_EXTENSION}",
+        mime="application/octet-stream",
+        help="Compressed columnar format, several times smaller than JSON; its header, transcript or "
+             "suggestions can be loaded on their own (see archive.py)",
+        on_click="ignore"
+    )